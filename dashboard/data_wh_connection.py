@@ -1,18 +1,72 @@
 import os
+from functools import lru_cache
 from pathlib import Path
 
 import duckdb
+import pandas as pd
+import pyarrow as pa
 
 # Prefer env var for containers; default to mount path used in Azure
 DUCKDB_PATH = Path(os.getenv("DUCKDB_PATH", "/mnt/data/spotify.duckdb"))
 
+# Tables that may be read through query_table; never interpolate caller input into SQL
+TABLES = {
+    "tracks": "main_mart.mart_spotify_tracks",
+    "top_artists": "main_mart.mart_spotify_top_artists",
+    "top_artist_tracks": "main_mart.mart_spotify_top_artist_tracks",
+    "genre_stats": "main_mart.mart_spotify_genre_stats",
+    "track_genres": "main_mart.mart_spotify_track_genres",
+}
 
-def get_connection(read_only: bool = True) -> duckdb.DuckDBPyConnection:
-    """Return a DuckDB connection to the warehouse."""
-    return duckdb.connect(str(DUCKDB_PATH), read_only=read_only)
 
+def get_connection(
+    read_only: bool = True,
+    db_path: Path | None = None,
+    config: dict[str, str] | None = None,
+) -> duckdb.DuckDBPyConnection:
+    """Return a DuckDB connection to the warehouse (DUCKDB_PATH unless db_path is given)."""
+    return duckdb.connect(str(db_path or DUCKDB_PATH), read_only=read_only, config=config or {})
 
-def query_table(table_name: str):
-    """Return the full table as a DataFrame."""
-    with get_connection(read_only=True) as conn:
-        return conn.execute(f"SELECT * FROM {table_name}").df()
+
+@lru_cache(maxsize=1)
+def _shared_connection() -> duckdb.DuckDBPyConnection:
+    """Process-wide read-only connection for non-Streamlit callers."""
+    return get_connection(read_only=True)
+
+
+def _resolve_table(table_name: str) -> str:
+    """Map a table key (or its fully qualified name) to the allowlisted relation."""
+    if table_name in TABLES:
+        return TABLES[table_name]
+    if table_name in TABLES.values():
+        return table_name
+    raise ValueError(f"Unknown table {table_name!r}; expected one of {sorted(TABLES)}.")
+
+
+def _string_types_mapper(arrow_type: pa.DataType):
+    """Keep string columns Arrow-backed instead of boxing them into object arrays."""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def arrow_to_pandas(table: pa.Table) -> pd.DataFrame:
+    """Convert an Arrow table to pandas with Arrow-backed string columns."""
+    return table.to_pandas(types_mapper=_string_types_mapper)
+
+
+def table(table_name: str) -> duckdb.DuckDBPyRelation:
+    """Return a lazy relation over the table; compose .filter/.project/.limit before fetching."""
+    # Bind to the cached connection itself: a relation built on a temporary cursor fails
+    # with "Connection has already been closed" once that cursor is garbage-collected
+    return _shared_connection().table(_resolve_table(table_name))
+
+
+def query_table(table_name: str, backend: str = "pandas"):
+    """Return the full table as a DataFrame, or as an Arrow table with backend="arrow"."""
+    if backend not in ("pandas", "arrow"):
+        raise ValueError(f"Unknown backend {backend!r}; expected 'pandas' or 'arrow'.")
+    arrow_table = table(table_name).fetch_arrow_table()
+    if backend == "arrow":
+        return arrow_table
+    return arrow_to_pandas(arrow_table)
@@ -1,15 +1,22 @@
 import streamlit as st
 import duckdb
+import numpy as np
 import pandas as pd
 import plotly.express as px
-import re
+import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from pathlib import Path
 from datetime import datetime
-import math
 import html
+import io
 import os
+from functools import lru_cache
+from typing import NamedTuple
 
-from data_wh_connection import get_connection, DUCKDB_PATH
+from data_wh_connection import get_connection, arrow_to_pandas, DUCKDB_PATH
 
 # ============================================================
 # Configuration
@@ -21,165 +28,19 @@ st.set_page_config(
     layout="wide"
 )
 
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600;700&family=Manrope:wght@400;500;600&display=swap');
-    :root {
-        --bg: #0e1116;
-        --panel: rgba(20, 27, 36, 0.9);
-        --accent: #1DB954;
-        --accent-2: #33e28c;
-        --text: #e7f6ee;
-        --muted: #9fb2c5;
-        --border: rgba(255, 255, 255, 0.08);
-        color-scheme: dark;
-    }
-    html, body, [class*="css"]  {
-        font-family: 'Space Grotesk', 'Manrope', sans-serif;
-        background: var(--bg);
-        color: var(--text);
-    }
-    .main { background: radial-gradient(circle at 10% 20%, rgba(51,226,140,0.08), transparent 25%), radial-gradient(circle at 80% 0%, rgba(29,185,84,0.08), transparent 30%), var(--bg); }
-    .hero {
-        background: linear-gradient(120deg, rgba(29,185,84,0.18), rgba(9,12,17,0.9));
-        border: 1px solid var(--border);
-        border-radius: 18px;
-        padding: 24px 26px;
-        position: relative;
-        overflow: hidden;
-        box-shadow: 0 25px 45px rgba(0,0,0,0.35);
-    }
-    .hero:before {
-        content: "";
-        position: absolute;
-        inset: -60% 60% 20% -30%;
-        background: radial-gradient(circle, rgba(29,185,84,0.15) 0%, transparent 60%);
-        transform: rotate(-8deg);
-    }
-    .hero h1 { font-size: 2.4rem; margin: 0 0 8px; color: #e9fff3; }
-    .hero p { color: var(--muted); margin: 0; }
-    .eyebrow { letter-spacing: 0.12em; text-transform: uppercase; font-size: 0.82rem; color: var(--accent-2); }
-    .pill {
-        display: inline-flex; align-items: center; gap: 6px;
-        background: rgba(29,185,84,0.12); color: var(--accent);
-        padding: 6px 10px; border-radius: 999px; font-weight: 600;
-        border: 1px solid rgba(29,185,84,0.3);
-    }
-    .metric-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 12px; margin-top: 10px; }
-    .metric-card {
-        background: var(--panel);
-        border: 1px solid var(--border);
-        border-radius: 14px;
-        padding: 14px;
-        box-shadow: 0 15px 30px rgba(0,0,0,0.3);
-    }
-    .metric-label { color: var(--muted); font-size: 0.9rem; }
-    .metric-value { font-size: 1.6rem; font-weight: 700; color: #eafff5; }
-    .metric-sub { color: var(--muted); font-size: 0.85rem; }
-    .section-title { font-size: 1.2rem; font-weight: 700; margin: 4px 0 8px; }
-    .panel {
-        background: var(--panel);
-        border: 1px solid var(--border);
-        border-radius: 16px;
-        padding: 16px;
-        box-shadow: 0 15px 30px rgba(0,0,0,0.28);
-    }
-    .track-card { background: rgba(255,255,255,0.03); padding: 12px; border-radius: 12px; margin: 0.35rem 0; border: 1px solid var(--border); }
-    .divider { border-top: 1px solid var(--border); margin: 14px 0; }
-    .muted { color: var(--muted); }
-    /* Sidebar revamp */
-    section[data-testid="stSidebar"] {
-        background: linear-gradient(180deg, rgba(18,23,31,0.95), rgba(10,13,19,0.97)), var(--bg);
-        border-left: 1px solid var(--border);
-        box-shadow: -12px 0 38px rgba(0,0,0,0.45);
-    }
-    section[data-testid="stSidebar"] .block-container {
-        padding: 18px 18px 36px;
-    }
-    .sidebar-hero {
-        background: linear-gradient(140deg, rgba(29,185,84,0.2), rgba(9,12,17,0.9));
-        border: 1px solid var(--border);
-        border-radius: 16px;
-        padding: 16px;
-        box-shadow: 0 20px 40px rgba(0,0,0,0.35);
-        position: relative;
-        overflow: hidden;
-        margin-bottom: 14px;
-    }
-    .sidebar-hero:after {
-        content: "";
-        position: absolute;
-        inset: -50% 60% 30% -40%;
-        background: radial-gradient(circle, rgba(51,226,140,0.18) 0%, transparent 60%);
-        transform: rotate(-12deg);
-    }
-    .sidebar-hero h3 { margin: 6px 0 6px; color: #e9fff3; }
-    .sidebar-hero p { margin: 0; color: var(--muted); }
-    .sidebar-chip-row { display: flex; gap: 6px; flex-wrap: wrap; margin-top: 10px; }
-    .sidebar-chip {
-        display: inline-flex; align-items: center; gap: 6px;
-        padding: 6px 10px;
-        border-radius: 999px;
-        background: rgba(255,255,255,0.05);
-        border: 1px solid var(--border);
-        color: var(--text);
-        font-weight: 600;
-        font-size: 0.9rem;
-    }
-    .sidebar-divider { border-top: 1px dashed var(--border); margin: 12px 0; opacity: 0.7; }
-    .side-title { text-transform: uppercase; letter-spacing: 0.08em; font-size: 0.82rem; color: var(--muted); margin: 8px 0 4px; font-weight: 700; }
-    section[data-testid="stSidebar"] label { color: var(--text); font-weight: 600; }
-    section[data-testid="stSidebar"] .stRadio > label { color: var(--muted); font-weight: 600; letter-spacing: 0.02em; }
-    section[data-testid="stSidebar"] div[data-testid="stSlider"] {
-        background: linear-gradient(140deg, rgba(29,185,84,0.10), rgba(9,12,17,0.92));
-        border: 1px solid var(--border);
-        border-radius: 12px;
-        padding: 10px 12px 6px;
-        box-shadow: 0 12px 24px rgba(0,0,0,0.25);
-        margin-bottom: 8px;
-    }
-    section[data-testid="stSidebar"] .stSelectbox div[data-baseweb="select"] {
-        background: rgba(255,255,255,0.04);
-        border: 1px solid var(--border);
-        border-radius: 12px;
-    }
-    section[data-testid="stSidebar"] .stSelectbox div[role="combobox"] { color: var(--text); }
-    section[data-testid="stSidebar"] .stTextInput input {
-        background: rgba(255,255,255,0.04);
-        border: 1px solid var(--border);
-        border-radius: 12px;
-        color: var(--text);
-    }
-    section[data-testid="stSidebar"] .stCheckbox > label { color: var(--text); font-weight: 600; }
-    .filter-summary {
-        display: flex;
-        flex-wrap: wrap;
-        align-items: center;
-        gap: 8px;
-        background: linear-gradient(120deg, rgba(29,185,84,0.14), rgba(12,16,23,0.95));
-        border: 1px solid var(--border);
-        border-radius: 14px;
-        padding: 10px 14px;
-        box-shadow: 0 18px 32px rgba(0,0,0,0.28);
-        margin: 12px 0 6px;
-    }
-    .chip {
-        display: inline-flex; align-items: center; gap: 6px;
-        padding: 6px 10px;
-        border-radius: 999px;
-        background: rgba(0,0,0,0.25);
-        border: 1px solid var(--border);
-        color: var(--text);
-        font-weight: 600;
-        font-size: 0.92rem;
-    }
-    .chip .dot {
-        width: 8px; height: 8px; border-radius: 50%;
-        display: inline-block; background: var(--accent-2);
-    }
-    /* Default slider styling (no overrides) */
-</style>
-""", unsafe_allow_html=True)
+# Derived frames (dropna, column selections) share buffers until written instead of copying eagerly
+pd.set_option("mode.copy_on_write", True)
+
+STYLES_PATH = Path(__file__).resolve().parent / "static" / "styles.css"
+
+
+@st.cache_data
+def load_css() -> str:
+    """Read the dashboard stylesheet once per process."""
+    return STYLES_PATH.read_text(encoding="utf-8")
+
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 # ============================================================
 # Database Connection
@@ -196,156 +57,898 @@ def get_db_connection():
         else:
             st.error(f"Database not found at {db_path} or {alt_path}. Run the data pipeline first.")
             st.stop()
-    return get_connection(read_only=True)
+    # Read-only skips WAL bookkeeping; threads lets DuckDB parallelize scans/aggregations across all cores.
+    # DuckDB refuses a second connection to this file with a different config, so every
+    # dashboard query (schema lookups included) must go through get_cursor().
+    conn = get_connection(
+        read_only=True,
+        db_path=db_path,
+        config={
+            "threads": str(os.cpu_count() or 4),
+            "memory_limit": os.getenv("DUCKDB_MEMORY_LIMIT", "4GB"),
+        },
+    )
+    # Reruns issue many small queries against the same tables: reuse cached metadata, skip stderr progress output
+    conn.execute("PRAGMA enable_object_cache")
+    conn.execute("PRAGMA disable_progress_bar")
+    return conn
+
+
+def get_cursor() -> duckdb.DuckDBPyConnection:
+    """Return a cursor on the shared connection so concurrent reruns don't share query state."""
+    return get_db_connection().cursor()
 
 # ============================================================
 # Data Loaders
 # ============================================================
-@st.cache_data
-def load_all_tracks():
-    conn = get_db_connection()
-    # Detect available optional columns (like genre) to avoid failing if absent
-    col_rows = conn.execute("PRAGMA table_info(main_mart.mart_spotify_tracks)").fetchall()
-    col_names = [c[1] for c in col_rows]
-    optional_genre = next((c for c in ["genre", "genres", "artist_genres", "main_artist_genres", "primary_genre"] if c in col_names), None)
-
-    select_cols = [
-        "track_id",
-        "track_name",
-        "main_artist_id",
-        "main_artist_name",
-        "main_artist_spotify_url",
-        "album_name",
-        "album_type",
-        "album__release_date",
-        "release_year",
-        "release_decade",
-        "popularity",
-        "popularity_bucket",
-        "is_recent_release",
-        "preview_url",
-        "cover_image_url",
-        "cover_height",
-        "cover_width",
-    ]
-    if optional_genre:
-        select_cols.append(optional_genre)
+GENRE_COLUMNS = ["genre", "genres", "artist_genres", "main_artist_genres", "primary_genre"]
+
+
+@st.cache_resource
+def load_mart_schema() -> dict[str, str]:
+    """Return {column: type} for the tracks mart (snapshot cached for the process lifetime).
+
+    Lives as long as the cached connection, which cannot see a rebuilt warehouse either.
+    """
+    conn = get_cursor()
+    rows = conn.execute("PRAGMA table_info(main_mart.mart_spotify_tracks)").fetchall()
+    return {r[1]: str(r[2]) for r in rows}
+
+
+@st.cache_data(ttl=600)
+def load_mart_relations() -> set[str]:
+    """Return the names of the tables/views in the mart schema."""
+    conn = get_cursor()
+    rows = conn.execute(
+        "SELECT table_name FROM information_schema.tables WHERE table_schema = 'main_mart'"
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
+@st.cache_resource
+def detect_genre_column() -> str | None:
+    """Return the first available genre-like column in the mart, if any."""
+    schema = load_mart_schema()
+    return next((c for c in GENRE_COLUMNS if c in schema), None)
 
+
+POPULARITY_RANGES = {
+    "All": (None, None),
+    "High (80+)": (80, None),
+    "Medium (50-79)": (50, 80),
+    "Low (<50)": (None, 50),
+}
+
+
+CATEGORY_COLUMNS = ["album_type", "main_artist_name"]
+
+RAW_PREVIEW_ROWS = 1000
+CARD_COVER_SIZE = 70
+
+
+class TrackFilters(NamedTuple):
+    """Sidebar filter state; plain values so it doubles as a cheap cache key."""
+    year_from: int
+    year_to: int
+    popularity_filter: str = "All"
+    recent_only: bool = False
+    previews_only: bool = False
+    search_term: str = ""
+
+    def is_unfiltered(self, min_year: int, max_year: int) -> bool:
+        """True when the filters select the whole catalog."""
+        return (
+            self.year_from <= min_year
+            and self.year_to >= max_year
+            and self.popularity_filter == "All"
+            and not self.recent_only
+            and not self.previews_only
+            and not self.search_term
+        )
+
+
+@st.cache_data(ttl=600)
+def load_year_bounds() -> tuple[int | None, int | None]:
+    """Return (min, max) release year across the mart."""
+    conn = get_cursor()
+    return conn.execute(
+        """
+        SELECT min(release_year), max(release_year)
+        FROM main_mart.mart_spotify_tracks
+        WHERE track_name IS NOT NULL
+        """
+    ).fetchone()
+
+
+def build_track_filter(filters: TrackFilters) -> tuple[str, list]:
+    """Translate the sidebar filters into a parameterized WHERE clause."""
+    clauses = ["track_name IS NOT NULL", "release_year BETWEEN ? AND ?"]
+    params: list = [filters.year_from, filters.year_to]
+
+    pop_min, pop_max = POPULARITY_RANGES.get(filters.popularity_filter, (None, None))
+    if pop_min is not None:
+        clauses.append("popularity >= ?")
+        params.append(pop_min)
+    if pop_max is not None:
+        clauses.append("popularity < ?")
+        params.append(pop_max)
+
+    if filters.recent_only:
+        _, max_year = load_year_bounds()
+        clauses.append("release_year >= ?")
+        params.append(max_year - 2)
+
+    if filters.previews_only:
+        clauses.append("preview_url IS NOT NULL AND preview_url <> ''")
+
+    if filters.search_term:
+        # Prefer the lowercased columns precomputed by dbt; fall back for older warehouses
+        if "track_name_lc" in load_mart_schema():
+            clauses.append("(contains(track_name_lc, ?) OR contains(main_artist_name_lc, ?))")
+        else:
+            clauses.append("(contains(lower(track_name), ?) OR contains(lower(main_artist_name), ?))")
+        params.extend([filters.search_term.lower()] * 2)
+
+    return " AND ".join(clauses), params
+
+
+TRACK_COLUMNS = [
+    "track_id",
+    "track_name",
+    "main_artist_id",
+    "main_artist_name",
+    "main_artist_spotify_url",
+    "album_name",
+    "album_type",
+    # Narrow ints: popularity is 0-100 and years fit in 16 bits, so pandas gets uint8/int16
+    # columns (float64 only if the column holds nulls) instead of 8-byte ones
+    "CAST(release_year AS SMALLINT) AS release_year",
+    "CAST(popularity AS UTINYINT) AS popularity",
+    "preview_url",
+    "cover_image_url",
+]
+
+
+def fetch_filtered_tracks_arrow(filters: TrackFilters) -> pa.Table:
+    """Run the filtered track query and return the raw Arrow result."""
+    conn = get_cursor()
+    where, params = build_track_filter(filters)
+    # Genre lists are aggregated in DuckDB (see compute_genre_stats), so keep them out of the frame.
+    # No ORDER BY: top-N views use nlargest / load_top_tracks, so a full sort here is wasted work;
+    # the preview and exports sort their own copy (sorted_for_export).
+    # popularity IS NOT NULL is not pushed down: tracks without a score still count in the KPIs.
     query = """
     SELECT {cols}
     FROM main_mart.mart_spotify_tracks
-    WHERE track_name IS NOT NULL
-    ORDER BY popularity DESC
-    """.format(cols=", ".join(select_cols))
+    WHERE {where}
+    """.format(cols=", ".join(TRACK_COLUMNS), where=where)
+    return conn.execute(query, params).fetch_arrow_table()
+
+
+@st.cache_data(ttl=600)
+def load_filtered_tracks_arrow(filters: TrackFilters) -> pa.Table:
+    """Cached Arrow result for display/export paths that never need pandas."""
+    return fetch_filtered_tracks_arrow(filters)
+
+
+def load_filtered_tracks(filters: TrackFilters) -> pd.DataFrame:
+    """Return the tracks matching the sidebar filters (unordered).
+
+    Not cached itself: the Arrow result is, and a second pickled pandas copy of
+    the same rows would only double the cache footprint.
+    """
     try:
-        return conn.execute(query).df()
+        df = arrow_to_pandas(load_filtered_tracks_arrow(filters))
+        # Low-cardinality labels: integer codes instead of per-row strings.
+        # Assign column by column; DataFrame.astype(dict) would copy every other column too.
+        for c in CATEGORY_COLUMNS:
+            df[c] = df[c].astype("category")
+        return df
     except Exception as e:
-        st.error(f"Error loading all tracks: {e}")
+        st.error(f"Error loading tracks: {e}")
         return pd.DataFrame()
 
 
+@st.cache_data(ttl=600)
+def load_top_tracks(filters: TrackFilters, k: int = 100) -> pd.DataFrame:
+    """Return the k most popular tracks matching the filters (DuckDB top-K, not a full sort).
+
+    Card fragments (cover_html, links_html) are built by DuckDB so rendering is plain templating.
+    """
+    conn = get_cursor()
+    where, params = build_track_filter(filters)
+    link_style = "color:var(--accent);text-decoration:none;"
+    query = """
+    SELECT
+        track_id,
+        track_name,
+        main_artist_name,
+        album_name,
+        release_year,
+        popularity,
+        CASE
+            WHEN coalesce(cover_image_url, '') = '' THEN ?
+            ELSE ? || cover_image_url || ?
+        END AS cover_html,
+        -- concat_ws skips NULLs, so missing links simply drop out
+        concat_ws(
+            ' • ',
+            CASE WHEN coalesce(main_artist_spotify_url, '') <> ''
+                THEN '<a href="' || main_artist_spotify_url || '" target="_blank" style="{link_style}">🎵 Spotify</a>' END,
+            CASE WHEN coalesce(preview_url, '') <> ''
+                THEN '<a href="' || preview_url || '" target="_blank" style="{link_style}">🎧 Preview</a>' END
+        ) AS links_html
+    FROM main_mart.mart_spotify_tracks
+    WHERE {where}
+    ORDER BY popularity DESC NULLS LAST
+    LIMIT ?
+    """.format(link_style=link_style, where=where)
+    img_prefix, img_suffix = _cover_img_parts(CARD_COVER_SIZE)
+    params = [_cover_html(None, CARD_COVER_SIZE), img_prefix, img_suffix] + params + [k]
+    return arrow_to_pandas(conn.execute(query, params).fetch_arrow_table())
+
+
+# ============================================================
+# Derived aggregates (cached per filter state)
+# ============================================================
+@st.cache_data(ttl=600)
+def compute_top_artists(filters: TrackFilters) -> pd.DataFrame:
+    conn = get_cursor()
+    where, params = build_track_filter(filters)
+    query = """
+    SELECT
+        main_artist_id,
+        main_artist_name,
+        COUNT(track_id) AS total_tracks,
+        round(AVG(popularity), 1) AS avg_popularity,
+        ROW_NUMBER() OVER (ORDER BY round(AVG(popularity), 1) DESC NULLS LAST, COUNT(track_id) DESC) AS computed_rank
+    FROM main_mart.mart_spotify_tracks
+    WHERE {where}
+    GROUP BY main_artist_id, main_artist_name
+    ORDER BY computed_rank
+    """.format(where=where)
+    return arrow_to_pandas(conn.execute(query, params).fetch_arrow_table())
+
+
+@st.cache_data(ttl=600)
+def compute_kpis(filters: TrackFilters, recent_from: int) -> tuple[int, float | None, int, int]:
+    """Return (track count, avg popularity, unique artists, tracks released since recent_from) in one pass."""
+    conn = get_cursor()
+    where, params = build_track_filter(filters)
+    query = """
+    SELECT
+        COUNT(*),
+        AVG(popularity),
+        COUNT(DISTINCT main_artist_name),
+        COUNT(*) FILTER (WHERE release_year >= ?)
+    FROM main_mart.mart_spotify_tracks
+    WHERE {where}
+    """.format(where=where)
+    return conn.execute(query, [recent_from] + params).fetchone()
+
+
+@st.cache_data(ttl=600)
+def compute_yearly_stats(filters: TrackFilters) -> pd.DataFrame:
+    conn = get_cursor()
+    where, params = build_track_filter(filters)
+    query = """
+    SELECT
+        release_year AS "Year",
+        COUNT(track_id) AS "Track Count",
+        AVG(popularity) AS "Avg Popularity"
+    FROM main_mart.mart_spotify_tracks
+    WHERE {where}
+    GROUP BY release_year
+    ORDER BY release_year
+    """.format(where=where)
+    return arrow_to_pandas(conn.execute(query, params).fetch_arrow_table())
+
+
+@st.cache_data(ttl=600)
+def compute_overview_highlights(filters: TrackFilters) -> dict:
+    """Return the overview's in-frame picks, computed together once per filter state.
+
+    Keys: top_track (dict), latest_releases (4-row frame), top_artist ((name, avg) or None),
+    album_mode ((album_type, share %) or None).
+    """
+    df = load_filtered_tracks(filters)
+    if df.empty:
+        return {"top_track": {}, "latest_releases": df, "top_artist": None, "album_mode": None}
+
+    top_track = df.nlargest(1, 'popularity')
+    top_track = (top_track if not top_track.empty else df).iloc[0].to_dict()
+
+    latest_releases = df.dropna(subset=['release_year']).nlargest(4, ['release_year', 'popularity'])
+
+    artist_avg = df.groupby('main_artist_name', observed=True)['popularity'].mean().nlargest(1)
+    top_artist = (artist_avg.index[0], artist_avg.iloc[0]) if not artist_avg.empty else None
+
+    # One counting pass gives both the mode and its share
+    album_counts = df['album_type'].value_counts()
+    album_mode = None
+    if len(album_counts) > 0 and album_counts.iloc[0] > 0:
+        album_mode = (album_counts.index[0], album_counts.iloc[0] / len(df) * 100)
+
+    return {
+        "top_track": top_track,
+        "latest_releases": latest_releases,
+        "top_artist": top_artist,
+        "album_mode": album_mode,
+    }
+
+
+@st.cache_data(ttl=600)
+def build_yearly_trend_figs(filters: TrackFilters) -> tuple[dict, dict]:
+    """Return the (track count, avg popularity) trend figures as plain dicts, cached per filter state."""
+    yearly_stats = compute_yearly_stats(filters)
+    years = yearly_stats['Year'].to_numpy()
+
+    fig_count = go.Figure(go.Scatter(
+        x=years,
+        y=yearly_stats['Track Count'].to_numpy(),
+        mode="lines+markers",
+        line=dict(color='#1DB954'),
+    ))
+    fig_count.update_layout(
+        title="Tracks Released per Year (in selected range)",
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis_title="Release Year",
+        yaxis_title="Track Count"
+    )
+
+    fig_pop = go.Figure(go.Scatter(
+        x=years,
+        y=yearly_stats['Avg Popularity'].to_numpy(),
+        mode="lines+markers",
+        line=dict(color='#1DB954'),
+    ))
+    fig_pop.update_layout(
+        title="Average Popularity Trend (in selected range)",
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis_title="Release Year",
+        yaxis_title="Average Popularity"
+    )
+    return fig_count.to_dict(), fig_pop.to_dict()
+
+
+@st.cache_data(ttl=600)
+def compute_album_dist(filters: TrackFilters) -> pd.DataFrame:
+    conn = get_cursor()
+    where, params = build_track_filter(filters)
+    query = """
+    SELECT
+        album_type AS "Album Type",
+        COUNT(*) AS "Count"
+    FROM main_mart.mart_spotify_tracks
+    WHERE {where}
+      AND album_type IS NOT NULL
+    GROUP BY album_type
+    ORDER BY "Count" DESC
+    """.format(where=where)
+    return arrow_to_pandas(conn.execute(query, params).fetch_arrow_table())
+
+
+@st.cache_data(ttl=600)
+def compute_pop_dist(filters: TrackFilters) -> pd.DataFrame:
+    pop_values = load_filtered_tracks_arrow(filters).column('popularity').drop_null().to_numpy().astype(np.int64)
+    # Popularity is an integer in [0, 100]: one counting pass, no hashing or index sort
+    counts = np.bincount(pop_values, minlength=101)[1:]
+    pop_df = pd.DataFrame({"Popularity": np.arange(1, len(counts) + 1), "Count": counts})
+    return pop_df[pop_df["Count"] > 0].reset_index(drop=True)
+
+
+def sorted_for_export(tbl: pa.Table) -> pa.Table:
+    """Most popular first (nulls last), track_id breaking ties so the order is stable across runs."""
+    return tbl.sort_by([("popularity", "descending"), ("track_id", "ascending")])
+
+
+@st.cache_data(ttl=600)
+def load_raw_preview(filters: TrackFilters) -> tuple[pa.Table, int]:
+    """Return (first RAW_PREVIEW_ROWS rows in export order, total row count)."""
+    tbl = load_filtered_tracks_arrow(filters)
+    return sorted_for_export(tbl).slice(0, RAW_PREVIEW_ROWS), tbl.num_rows
+
+
+@st.cache_data(ttl=600)
+def to_csv_bytes(filters: TrackFilters) -> bytes:
+    # Arrow's multi-threaded C++ writer straight from the DuckDB result, no pandas per-cell formatting
+    buf = io.BytesIO()
+    pa_csv.write_csv(sorted_for_export(load_filtered_tracks_arrow(filters)), buf)
+    return buf.getvalue()
+
+
+@st.cache_data(ttl=600)
+def to_parquet_bytes(filters: TrackFilters) -> bytes:
+    # Columnar + zstd: faster to write and several times smaller than the CSV export
+    buf = io.BytesIO()
+    pq.write_table(sorted_for_export(load_filtered_tracks_arrow(filters)), buf, compression="zstd")
+    return buf.getvalue()
+
 
 # ============================================================
 # Helper
 # ============================================================
+# Card markup, filled per row with str.format_map. Each card is a single line:
+# a blank line would end markdown's HTML block.
+TRACK_CARD_TEMPLATE = (
+    '<div class="panel" style="background:rgba(0,0,0,0.12); border:1px solid var(--border); padding:12px;">'
+    '<div style="display:flex; gap:12px; align-items:center;">'
+    '{cover_html}'
+    '<div>'
+    '<div style="display:flex; gap:8px; align-items:center;">{rank_badge}{pop_badge}</div>'
+    '<div style="font-weight:700; margin-top:4px;">{track_name}</div>'
+    '<div class="muted">by {main_artist_name}</div>'
+    '<div class="muted">{album_name} • {release_year}</div>'
+    '</div>'
+    '</div>'
+    '<div style="margin-top:8px; display:flex; gap:10px; flex-wrap:wrap;">{links_html}</div>'
+    '</div>'
+)
+TOP_TRACK_TEMPLATE = (
+    '<div class="panel" style="display:flex; gap:16px; align-items:center;">'
+    '{cover}'
+    '<div>'
+    '<div class="pill">Popularity {popularity}/100</div>'
+    '<h3 style="margin:6px 0;">{track_name}</h3>'
+    '<div class="muted">By {main_artist_name}</div>'
+    '<div class="muted">Album: {album_name} • {release_year}</div>'
+    '<div style="margin-top:6px;">{spotify_link}</div>'
+    '</div>'
+    '</div>'
+)
+FRESH_CARD_TEMPLATE = (
+    '<div class="track-card">'
+    '<div style="display:flex; align-items:center; gap:10px;">'
+    '{cover}'
+    '<div>'
+    '<div><strong>{track_name}</strong></div>'
+    '<div class="muted">{main_artist_name} • {release_year}</div>'
+    '</div>'
+    '</div>'
+    '</div>'
+)
+
+
+# Cover markup shared by every cover path (per-row, column-wise and SQL-built cards)
+COVER_IMG_TEMPLATE = '<img src="{url}" width="{size}" height="{size}" style="border-radius:5px;">'
+COVER_PLACEHOLDER_TEMPLATE = (
+    '<div style="width:{size}px;height:{size}px;background:#ddd;border-radius:5px;'
+    'display:flex;align-items:center;justify-content:center;">🎵</div>'
+)
+
+
+@lru_cache(maxsize=16)
+def _cover_img_parts(size: int) -> tuple[str, str]:
+    """Split COVER_IMG_TEMPLATE around the URL for callers that concatenate columns."""
+    prefix, suffix = COVER_IMG_TEMPLATE.format(url="{url}", size=size).split("{url}")
+    return prefix, suffix
+
+
+@lru_cache(maxsize=4096)
+def _cover_html(image_url: str | None, size: int) -> str:
+    if image_url is None:
+        return COVER_PLACEHOLDER_TEMPLATE.format(size=size)
+    return COVER_IMG_TEMPLATE.format(url=image_url, size=size)
+
+
 def create_cover_html(image_url, size=60):
+    # Normalize NaN/NA/"" to None so every missing cover shares one cache entry
     if pd.isna(image_url) or image_url == "":
-        return f'<div style="width:{size}px;height:{size}px;background:#ddd;border-radius:5px;display:flex;align-items:center;justify-content:center;">🎵</div>'
-    return f'<img src="{image_url}" width="{size}" height="{size}" style="border-radius:5px;">'
-
-
-def normalize_genres(series: pd.Series) -> pd.Series:
-    """Normalize any genre-like column (list or comma-delimited string) into a flat lowercase series."""
-    if series is None or series.empty:
-        return pd.Series(dtype=object)
-    values = []
-    for val in series.dropna():
-        if isinstance(val, (list, tuple)):
-            values.extend(val)
-        elif isinstance(val, str):
-            cleaned = val.replace(";", ",")
-            cleaned = cleaned.replace("{", "").replace("}", "").replace("[", "").replace("]", "")
-            parts = [p.strip().strip("'\"") for p in cleaned.split(",") if p.strip()]
-            values.extend(parts)
+        image_url = None
+    return _cover_html(image_url, size)
+
+
+def cover_html_column(image_urls: pd.Series, size: int) -> np.ndarray:
+    """Vectorized create_cover_html: one cover snippet per row, built column-wise."""
+    urls = image_urls.astype("string").fillna("")
+    img_prefix, img_suffix = _cover_img_parts(size)
+    img_html = (img_prefix + urls + img_suffix).to_numpy(dtype=object)
+    return np.where(urls.eq("").to_numpy(dtype=bool), _cover_html(None, size), img_html)
+
+
+@st.cache_data(ttl=600)
+def compute_genre_stats(filters: TrackFilters, genre_col: str) -> pd.DataFrame:
+    """Return genre stats with diminishing volume weight + popularity.
+
+    Explode, clean and aggregate all run inside DuckDB on the filtered mart;
+    only the per-genre result comes back.
+    """
+    conn = get_cursor()
+    # The whole-catalog leaderboard is precomputed by dbt (mart_spotify_genre_stats)
+    if (
+        genre_col == "main_artist_genres"
+        and "mart_spotify_genre_stats" in load_mart_relations()
+        and filters.is_unfiltered(*load_year_bounds())
+    ):
+        query = "SELECT * FROM main_mart.mart_spotify_genre_stats ORDER BY score DESC"
+        return arrow_to_pandas(conn.execute(query).fetch_arrow_table())
+
+    where, params = build_track_filter(filters)
+    if genre_col == "main_artist_genres" and "mart_spotify_track_genres" in load_mart_relations():
+        # Genres were exploded and cleaned once by dbt; just join the filtered tracks
+        cleaned_cte = """
+    WITH cleaned AS (
+        SELECT t.track_id, t.main_artist_name, t.popularity, g.genre_clean
+        FROM main_mart.mart_spotify_track_genres g
+        JOIN main_mart.mart_spotify_tracks t USING (track_id)
+        WHERE {where}
+    )
+    """.format(where=where)
+    else:
+        col_type = load_mart_schema().get(genre_col, "").upper()
+        if col_type.endswith("[]") or "LIST" in col_type:
+            # Already a list: normalize with DuckDB's list kernels, no string splitting
+            genres_expr = f"list_distinct(list_transform({genre_col}, x -> lower(trim(x))))"
         else:
-            try:
-                # DuckDB arrays may come through as numpy arrays / Arrow lists
-                values.extend(list(val))
-            except Exception:
-                continue
-    return pd.Series(values, dtype="object").str.lower().str.strip()
-
-
-def to_genre_list(val) -> list[str]:
-    """Return a normalized genre list for a single row."""
-    # Handle common sequence types first (avoid pd.isna on arrays)
-    if isinstance(val, (list, tuple, set)):
-        return [str(x).lower().strip() for x in val if str(x).strip()]
-    try:
-        import numpy as np  # type: ignore
-        if isinstance(val, np.ndarray):
-            return [str(x).lower().strip() for x in val.tolist() if str(x).strip()]
-    except Exception:
-        pass
-    if isinstance(val, str):
-        cleaned = val.replace(";", ",").replace("{", "").replace("}", "").replace("[", "").replace("]", "")
-        return [p.strip().strip("'\"").lower() for p in cleaned.split(",") if p.strip()]
-    try:
-        if pd.isna(val):
-            return []
-    except Exception:
-        pass
-    try:
-        return [str(x).lower().strip() for x in list(val) if str(x).strip()]
-    except Exception:
-        # Fallback to scalar
-        return [str(val).lower().strip()] if str(val).strip() else []
-
-
-def clean_genre_label(label) -> str | None:
-    """Normalize a single genre label to a clean string; return None if empty."""
-    if isinstance(label, (list, tuple, set)):
-        if len(label) == 0:
-            return None
-        label = ",".join([str(x) for x in label])
-    label = str(label)
-    cleaned = re.sub(r'[\[\]\{\}\"]', "", label)
-    cleaned = cleaned.replace("'", "").strip().lower()
-    return cleaned or None
-
-
-def compute_genre_stats(df: pd.DataFrame, genre_col: str) -> pd.DataFrame:
-    """Return genre stats with diminishing volume weight + popularity."""
-    work = df[[genre_col, "popularity", "track_id", "main_artist_name"]].copy()
-    work["genre_list"] = work[genre_col].apply(to_genre_list)
-    exploded = work.explode("genre_list")
-    exploded = exploded[exploded["genre_list"].notna() & (exploded["genre_list"] != "")]
-    exploded["genre_clean"] = exploded["genre_list"].apply(clean_genre_label)
-    exploded = exploded[exploded["genre_clean"].notna() & (exploded["genre_clean"] != "")]
-    if exploded.empty:
-        return pd.DataFrame()
-    exploded["pop_weight"] = exploded["popularity"].fillna(0) / 100.0
-    genre_stats = (
-        exploded.groupby("genre_clean")
-        .agg(
-            tracks=("track_id", "nunique"),
-            artists=("main_artist_name", "nunique"),
-            popularity_score=("pop_weight", "sum"),
-            pop_mean=("popularity", "mean"),
+            genres_expr = f"string_split_regex({genre_col}, '[,;]')"
+        cleaned_cte = r"""
+    WITH exploded AS (
+        SELECT track_id, main_artist_name, popularity, unnest({genres}) AS genre
+        FROM main_mart.mart_spotify_tracks
+        WHERE {where}
+          AND {genre_col} IS NOT NULL
+    ),
+    cleaned AS (
+        SELECT
+            track_id,
+            main_artist_name,
+            popularity,
+            lower(trim(regexp_replace(genre, '[\[\]{{}}"'']', '', 'g'))) AS genre_clean
+        FROM exploded
+    )
+    """.format(genres=genres_expr, genre_col=genre_col, where=where)
+
+    query = cleaned_cte + """
+    SELECT
+        genre_clean,
+        -- Exact counts, same definitions as mart_spotify_genre_stats, so the figures
+        -- don't shift between the unfiltered and the filtered path
+        COUNT(DISTINCT track_id) AS tracks,
+        COUNT(DISTINCT main_artist_name) AS artists,
+        SUM(COALESCE(popularity, 0) / 100.0) AS popularity_score,
+        AVG(popularity) AS pop_mean,
+        -- Diminishing returns on volume, still reward bigger pools
+        sqrt(COUNT(DISTINCT track_id)) * 25 AS volume_weight,
+        sqrt(COUNT(DISTINCT track_id)) * 25 + AVG(popularity) AS score
+    FROM cleaned
+    WHERE genre_clean IS NOT NULL AND genre_clean <> ''
+    GROUP BY genre_clean
+    ORDER BY score DESC
+    """
+    return arrow_to_pandas(conn.execute(query, params).fetch_arrow_table())
+
+
+def render_track_cards(track_df: pd.DataFrame):
+    """Render load_top_tracks rows as cards in a two-column grid with a single markdown call."""
+    cards = []
+    for idx, track in enumerate(track_df.itertuples(index=False), start=1):
+        popularity = track.popularity if not pd.isna(track.popularity) else 0
+        rank_badge = f"<span class='pill'>#{idx}</span>"
+        pop_badge = f"<span class='pill'>Pop {int(popularity)}/100</span>"
+        cards.append(TRACK_CARD_TEMPLATE.format_map(
+            track._asdict() | {"rank_badge": rank_badge, "pop_badge": pop_badge}
+        ))
+    grid_html = f'<div style="display:grid; grid-template-columns:1fr 1fr; gap:12px;">{"".join(cards)}</div>'
+    st.markdown(grid_html, unsafe_allow_html=True)
+
+
+# ============================================================
+# Views
+# ============================================================
+@st.fragment
+def render_track_list(filters: TrackFilters, count_options: list[int]):
+    """Track-count picker plus cards; changing the count reruns only this fragment."""
+    display_count = st.selectbox("Number of tracks to display:", count_options, index=0)
+    render_track_cards(load_top_tracks(filters, display_count))
+
+
+def render_top_artists(filters: TrackFilters):
+    st.markdown("## 🎤 Top Artists")
+
+    top_artists = compute_top_artists(filters)
+
+    st.subheader(f"📊 Found {len(top_artists)} unique artists")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("### 🏆 Top Artists by Track Count")
+        top_by_tracks = top_artists.nlargest(15, 'total_tracks')
+        fig_tracks = px.bar(
+            top_by_tracks,
+            x='total_tracks',
+            y='main_artist_name',
+            orientation='h',
+            title="Top 15 Artists (by number of tracks)",
+            color='total_tracks',
+            color_continuous_scale='Greens',
+            labels={'total_tracks': 'Track Count', 'main_artist_name': 'Artist'}
+        )
+        fig_tracks.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            showlegend=False,
+            height=500,
+            yaxis=dict(autorange="reversed"),
+        )
+        st.plotly_chart(fig_tracks)
+
+    with col2:
+        st.markdown("### ⭐ Top Artists by Avg Popularity")
+        # compute_top_artists already returns rows in computed_rank order (avg popularity, then track count)
+        top_by_pop = top_artists.head(15)
+        fig_pop = px.bar(
+            top_by_pop,
+            x='avg_popularity',
+            y='main_artist_name',
+            orientation='h',
+            title="Top 15 Artists (by avg popularity)",
+            color='avg_popularity',
+            color_continuous_scale='Greens',
+            labels={'avg_popularity': 'Avg Popularity', 'main_artist_name': 'Artist'}
         )
-        .reset_index()
+        fig_pop.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            showlegend=False,
+            height=500,
+            yaxis=dict(autorange="reversed"),
+        )
+        st.plotly_chart(fig_pop)
+
+    st.markdown("### 📈 Artist Performance Matrix")
+    # WebGL draws every artist into one canvas instead of one SVG node per point
+    total_tracks = top_artists['total_tracks'].to_numpy()
+    avg_popularity = top_artists['avg_popularity'].to_numpy()
+    fig_scatter = go.Figure(go.Scattergl(
+        x=total_tracks,
+        y=avg_popularity,
+        mode='markers',
+        marker=dict(
+            size=np.clip(total_tracks * 2, 4, 40),
+            color=avg_popularity,
+            colorscale='Greens',
+            showscale=True,
+            colorbar=dict(title='Avg Popularity'),
+        ),
+        text=top_artists['main_artist_name'].to_numpy(),
+        hovertemplate="<b>%{text}</b><br>Number of Tracks: %{x}<br>Avg Popularity: %{y}<extra></extra>",
+    ))
+    fig_scatter.update_layout(
+        title="Artists: Track Count vs Average Popularity",
+        xaxis_title='Number of Tracks',
+        yaxis_title='Avg Popularity',
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=500,
     )
-    # Diminishing returns on volume, still reward bigger pools
-    genre_stats["volume_weight"] = genre_stats["tracks"].apply(lambda x: math.sqrt(x) * 25)
-    genre_stats["score"] = genre_stats["volume_weight"] + genre_stats["pop_mean"]
-    return genre_stats.sort_values("score", ascending=False)
+    st.plotly_chart(fig_scatter)
+
+
+def render_all_tracks(filters: TrackFilters):
+    st.markdown("## 🎵 Tracks in view")
+    render_track_list(filters, [25, 50, 100, 200])
+
+    st.markdown("### 📊 Track analytics")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("Album Type Distribution")
+        album_df = compute_album_dist(filters)
+        if len(album_df) > 0:
+            counts = album_df["Count"].to_numpy()
+            fig_album = go.Figure(go.Bar(
+                x=counts,
+                y=album_df["Album Type"].to_numpy(),
+                orientation="h",
+                marker=dict(color=counts, colorscale="Greens"),
+            ))
+            fig_album.update_layout(
+                title="Distribution by Album Type",
+                plot_bgcolor='rgba(0,0,0,0)',
+                showlegend=False,
+                height=380,
+                yaxis=dict(autorange="reversed"),
+            )
+            st.plotly_chart(fig_album)
+        else:
+            st.write("No album type distribution to show.")
+
+    with col2:
+        st.markdown("Popularity Distribution")
+        pop_df = compute_pop_dist(filters)
+        if pop_df.empty:
+            st.write("No popularity data to show.")
+        else:
+            fig_hist = go.Figure(go.Scatter(
+                x=pop_df["Popularity"].to_numpy(),
+                y=pop_df["Count"].to_numpy(),
+                mode="lines+markers",
+                line=dict(color='#1DB954'),
+            ))
+            fig_hist.update_layout(
+                title="Popularity Distribution (pop > 0)",
+                plot_bgcolor='rgba(0,0,0,0)',
+                xaxis_title="Popularity",
+                yaxis_title="Number of Tracks",
+                height=380,
+            )
+            st.plotly_chart(fig_hist)
+
+
+def render_overview(filters: TrackFilters, max_year_available: int):
+    # Overview: rich story with metrics, highlights, genres, trends, and a small track spotlight
+    highlights = compute_overview_highlights(filters)
+    total_tracks, avg_pop, unique_artists, recent_tracks = compute_kpis(filters, max_year_available - 2)
+    stats = [
+        ("Tracks", f"{total_tracks:,}", "Within selected period"),
+        ("Avg popularity", f"{avg_pop:.1f}" if avg_pop is not None else "–", "0–100 scale"),
+        ("Unique artists", f"{unique_artists:,}", "Primary artists"),
+    ]
+    st.markdown('<div class="metric-grid">', unsafe_allow_html=True)
+    for label, value, sub in stats:
+        st.markdown(
+            f"""
+            <div class="metric-card">
+                <div class="metric-label">{label}</div>
+                <div class="metric-value">{value}</div>
+                <div class="metric-sub">{sub}</div>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    highlight_col1, highlight_col2 = st.columns([2, 1])
+    with highlight_col1:
+        st.markdown("### 🔥 Most popular track right now")
+        top_track = highlights["top_track"]
+        spotify_url = top_track.get('main_artist_spotify_url')
+        top_card = TOP_TRACK_TEMPLATE.format(
+            cover=create_cover_html(top_track.get('cover_image_url', None), 90),
+            popularity=int(top_track.get('popularity', 0)),
+            track_name=top_track.get('track_name', ''),
+            main_artist_name=top_track.get('main_artist_name', ''),
+            album_name=top_track.get('album_name', ''),
+            release_year=top_track.get('release_year', ''),
+            spotify_link=(
+                f"<a href='{spotify_url}' target='_blank' style='color:var(--accent);text-decoration:none;'>Open in Spotify</a>"
+                if not pd.isna(spotify_url) and spotify_url else ""
+            ),
+        )
+        st.markdown(top_card, unsafe_allow_html=True)
+
+    with highlight_col2:
+        st.markdown("### 🆕 Fresh releases")
+        latest_releases = highlights["latest_releases"]
+        # One markdown call for all cards
+        fresh_cards = [
+            FRESH_CARD_TEMPLATE.format_map(row._asdict() | {"cover": cover})
+            for row, cover in zip(
+                latest_releases.itertuples(index=False),
+                cover_html_column(latest_releases["cover_image_url"], 46),
+            )
+        ]
+        st.markdown("".join(fresh_cards), unsafe_allow_html=True)
+
+    st.markdown("### 💡 Quick insights")
+    insight_cols = st.columns(3)
+
+    with insight_cols[0]:
+        if highlights["top_artist"] is not None:
+            artist_name, artist_avg = highlights["top_artist"]
+            st.markdown(
+                f"""
+                <div class="metric-card">
+                    <div class="metric-label">Highest avg popularity</div>
+                    <div class="metric-value">{artist_name}</div>
+                    <div class="metric-sub">{artist_avg:.1f} / 100</div>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+        else:
+            st.markdown(
+                '<div class="metric-card"><div class="metric-label">Highest avg popularity</div><div class="metric-sub">No artist data</div></div>',
+                unsafe_allow_html=True,
+            )
+
+    with insight_cols[1]:
+        if highlights["album_mode"] is not None:
+            album_mode, share = highlights["album_mode"]
+            st.markdown(
+                f"""
+                <div class="metric-card">
+                    <div class="metric-label">Dominant format</div>
+                    <div class="metric-value">{album_mode.title()}</div>
+                    <div class="metric-sub">{share:.0f}% of filtered tracks</div>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+        else:
+            st.markdown(
+                '<div class="metric-card"><div class="metric-label">Dominant format</div><div class="metric-sub">No data</div></div>',
+                unsafe_allow_html=True,
+            )
+
+    with insight_cols[2]:
+        recent_share = recent_tracks / total_tracks * 100 if total_tracks else 0
+        st.markdown(
+            f"""
+            <div class="metric-card">
+                <div class="metric-label">Recent share</div>
+                <div class="metric-value">{recent_share:.0f}%</div>
+                <div class="metric-sub">Released in last 3 years</div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+
+    st.markdown("## 🎶 Genres & mood")
+    genre_col = detect_genre_column()
+    if genre_col:
+        genre_stats = compute_genre_stats(filters, genre_col)
+        if genre_stats.empty:
+            st.info("No genre values available in the current selection.")
+        else:
+            top_genres = genre_stats.head(12)
+            g1, g2 = st.columns([2, 1])
+            with g1:
+                scores = top_genres["score"].to_numpy()
+                fig_genre = go.Figure(go.Bar(
+                    x=scores,
+                    y=top_genres["genre_clean"].to_numpy(),
+                    orientation="h",
+                    marker=dict(color=scores, colorscale="Greens"),
+                    hovertemplate="Genre: %{y}<br>Score: %{x:.1f}<extra></extra>",
+                ))
+                fig_genre.update_layout(
+                    title="Top genres (diminishing volume + popularity)",
+                    xaxis_title="Score",
+                    yaxis_title="Genre",
+                    plot_bgcolor="rgba(0,0,0,0)",
+                    height=420,
+                    showlegend=False,
+                    yaxis=dict(autorange="reversed"),
+                )
+                st.plotly_chart(fig_genre)
+            with g2:
+                lead = top_genres.iloc[0]
+                top5 = top_genres.head(5)
+                lead_html = f"""
+                <div class="panel" style="background:rgba(0,0,0,0.15); border:1px solid var(--border);">
+                    <div class="metric-label">Leading genre</div>
+                    <div class="metric-value" style="margin:4px 0;">{lead['genre_clean'].title()}</div>
+                    <div class="metric-sub">Tracks: {int(lead['tracks'])} • Artists: {int(lead['artists'])}</div>
+                    <div class="metric-sub">Avg popularity: {lead['pop_mean']:.1f} • Score: {lead['score']:.1f}</div>
+                    <div class="divider"></div>
+                    <div class="metric-label">Top 5</div>
+                    <ul style="padding-left:18px; margin:4px 0;">
+                """
+                for _, row in top5.iterrows():
+                    lead_html += f"<li>{row['genre_clean'].title()} • {int(row['tracks'])} tracks • pop {row['pop_mean']:.1f}</li>"
+                lead_html += "</ul></div>"
+                st.markdown(lead_html, unsafe_allow_html=True)
+    else:
+        st.info("No genre column found in the mart. Add a genre field to `main_mart.mart_spotify_tracks` (e.g., main artist genre) to enable this view.")
+
+    st.markdown("## 📈 Trends")
+    fig_count, fig_pop = build_yearly_trend_figs(filters)
+
+    tab1, tab2 = st.tabs(["Release trend", "Distributions"])
+
+    with tab1:
+        st.plotly_chart(fig_count)
+
+    with tab2:
+        st.plotly_chart(fig_pop)
+
+    st.markdown("## 🎵 Track spotlight")
+    render_track_list(filters, [10, 25, 50])
+
 
 # ============================================================
 # Main
 # ============================================================
 def main():
-    df_all = load_all_tracks()
-    if df_all.empty:
+    min_year_available, max_year_available = load_year_bounds()
+    if min_year_available is None:
         st.warning("No data available. Run the data pipeline first (dbt/dlt).")
         return
 
@@ -369,8 +972,8 @@ def main():
     st.sidebar.markdown('<div class="sidebar-divider"></div>', unsafe_allow_html=True)
 
     st.sidebar.markdown('<div class="side-title">Release window</div>', unsafe_allow_html=True)
-    min_year_available = int(df_all['release_year'].min())
-    max_year_available = int(df_all['release_year'].max())
+    min_year_available = int(min_year_available)
+    max_year_available = int(max_year_available)
 
     release_box = st.sidebar.container()
     with release_box:
@@ -401,41 +1004,30 @@ def main():
     # ============================================================
     # Apply all filters
     # ============================================================
-    filtered_df = df_all[
-        (df_all['release_year'] >= year_from) & 
-        (df_all['release_year'] <= year_to)
-    ].copy()
-
-    if popularity_filter != "All":
-        if popularity_filter == "High (80+)":
-            filtered_df = filtered_df[filtered_df['popularity'] >= 80]
-        elif popularity_filter == "Medium (50-79)":
-            filtered_df = filtered_df[(filtered_df['popularity'] >= 50) & (filtered_df['popularity'] < 80)]
-        else:
-            filtered_df = filtered_df[filtered_df['popularity'] < 50]
-
-    if recent_only:
-        cutoff = max_year_available - 2
-        filtered_df = filtered_df[filtered_df['release_year'] >= cutoff]
-
-    if previews_only:
-        filtered_df = filtered_df[filtered_df['preview_url'].notna() & (filtered_df['preview_url'] != "")]
-
-    if search_term and search_term.strip() != "":
-        s = search_term.strip().lower()
-        filtered_df = filtered_df[
-            filtered_df['track_name'].str.lower().str.contains(s) |
-            filtered_df['main_artist_name'].str.lower().str.contains(s)
-        ]
+    filters = TrackFilters(
+        year_from=year_from,
+        year_to=year_to,
+        popularity_filter=popularity_filter,
+        recent_only=recent_only,
+        previews_only=previews_only,
+        search_term=(search_term or "").strip(),
+    )
+    # The header only needs a row count and the newest year: read them off the cached
+    # Arrow table instead of converting it to pandas
+    try:
+        tracks_tbl = load_filtered_tracks_arrow(filters)
+    except Exception as e:
+        st.error(f"Error loading tracks: {e}")
+        return
 
-    if filtered_df.empty:
+    if tracks_tbl.num_rows == 0:
         st.info("No results for the selected filters.")
         return
 
     # ============================================================
     # Hero & Snapshot
     # ============================================================
-    latest_year = int(filtered_df['release_year'].max())
+    latest_year = pc.max(tracks_tbl['release_year']).as_py()
     year_count = year_to - year_from + 1
     hero_html = f"""
     <div class="hero">
@@ -444,7 +1036,7 @@ def main():
                 <div class="eyebrow">Spotify • Sweden</div>
                 <h1>Tracks streaming in Sweden {year_from}–{year_to}</h1>
                 <p>See how each era performs, surface the real movers, and let filters steer the view.</p>
-                <div style="margin-top:10px;" class="pill">🎧 {len(filtered_df):,} tracks in view</div>
+                <div style="margin-top:10px;" class="pill">🎧 {tracks_tbl.num_rows:,} tracks in view</div>
             </div>
             <div class="panel" style="min-width:240px; background:rgba(0,0,0,0.25);">
                 <div class="metric-label">Latest release year</div>
@@ -485,410 +1077,45 @@ def main():
     """
     st.markdown(filter_summary_html, unsafe_allow_html=True)
 
-    # Helper: render track cards in grid
-    def render_track_cards(track_df):
-        cards_per_row = 2
-        cols = st.columns(cards_per_row)
-        for idx, track in enumerate(track_df.itertuples(index=False), start=1):
-            col = cols[(idx - 1) % cards_per_row]
-            if (idx - 1) % cards_per_row == 0 and idx != 1:
-                cols = st.columns(cards_per_row)
-                col = cols[0]
-            popularity = track.popularity if not pd.isna(track.popularity) else 0
-            rank_badge = f"<span class='pill'>#{idx}</span>"
-            pop_badge = f"<span class='pill'>Pop {int(popularity)}/100</span>"
-            links = []
-            if track.main_artist_spotify_url:
-                links.append(f'<a href="{track.main_artist_spotify_url}" target="_blank" style="color:var(--accent);text-decoration:none;">🎵 Spotify</a>')
-            if track.preview_url:
-                links.append(f'<a href="{track.preview_url}" target="_blank" style="color:var(--accent);text-decoration:none;">🎧 Preview</a>')
-            links_html = " • ".join(links)
-            card_html = f"""
-            <div class="panel" style="background:rgba(0,0,0,0.12); border:1px solid var(--border); padding:12px;">
-                <div style="display:flex; gap:12px; align-items:center;">
-                    {create_cover_html(track.cover_image_url, 70)}
-                    <div>
-                        <div style="display:flex; gap:8px; align-items:center;">{rank_badge}{pop_badge}</div>
-                        <div style="font-weight:700; margin-top:4px;">{track.track_name}</div>
-                        <div class="muted">by {track.main_artist_name}</div>
-                        <div class="muted">{track.album_name} • {track.release_year}</div>
-                    </div>
-                </div>
-                <div style="margin-top:8px; display:flex; gap:10px; flex-wrap:wrap;">
-                    {links_html}
-                </div>
-            </div>
-            """
-            with col:
-                st.markdown(card_html, unsafe_allow_html=True)
-
     # ============================================================
     # View-specific rendering
     # ============================================================
     if view_mode == "Top artists":
-        st.markdown("## 🎤 Top Artists")
-
-        top_artists = (
-            filtered_df.groupby(['main_artist_id', 'main_artist_name'], dropna=False)
-            .agg(total_tracks=('track_id', 'count'), avg_popularity=('popularity', 'mean'))
-            .round(1)
-            .sort_values(['avg_popularity', 'total_tracks'], ascending=[False, False])
-            .reset_index()
-        )
-        top_artists['computed_rank'] = range(1, len(top_artists) + 1)
-
-        st.subheader(f"📊 Found {len(top_artists)} unique artists")
-
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("### 🏆 Top Artists by Track Count")
-            top_by_tracks = top_artists.nlargest(15, 'total_tracks')
-            fig_tracks = px.bar(
-                top_by_tracks,
-                x='total_tracks',
-                y='main_artist_name',
-                orientation='h',
-                title="Top 15 Artists (by number of tracks)",
-                color='total_tracks',
-                color_continuous_scale='Greens',
-                labels={'total_tracks': 'Track Count', 'main_artist_name': 'Artist'}
-            )
-            fig_tracks.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                showlegend=False,
-                height=500,
-                yaxis=dict(autorange="reversed"),
-            )
-            st.plotly_chart(fig_tracks)
-
-        with col2:
-            st.markdown("### ⭐ Top Artists by Avg Popularity")
-            top_by_pop = top_artists.nlargest(15, 'avg_popularity')
-            fig_pop = px.bar(
-                top_by_pop,
-                x='avg_popularity',
-                y='main_artist_name',
-                orientation='h',
-                title="Top 15 Artists (by avg popularity)",
-                color='avg_popularity',
-                color_continuous_scale='Greens',
-                labels={'avg_popularity': 'Avg Popularity', 'main_artist_name': 'Artist'}
-            )
-            fig_pop.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                showlegend=False,
-                height=500,
-                yaxis=dict(autorange="reversed"),
-            )
-            st.plotly_chart(fig_pop)
-
-        st.markdown("### 📈 Artist Performance Matrix")
-        fig_scatter = px.scatter(
-            top_artists,
-            x='total_tracks',
-            y='avg_popularity',
-            size='total_tracks',
-            hover_name='main_artist_name',
-            title="Artists: Track Count vs Average Popularity",
-            color='avg_popularity',
-            color_continuous_scale='Greens',
-            labels={'total_tracks': 'Number of Tracks', 'avg_popularity': 'Avg Popularity'}
-        )
-        fig_scatter.update_layout(plot_bgcolor='rgba(0,0,0,0)', height=500)
-        st.plotly_chart(fig_scatter)
-
+        render_top_artists(filters)
     elif view_mode == "All tracks":
-        st.markdown("## 🎵 Tracks in view")
-        display_count = st.selectbox("Number of tracks to display:", [25, 50, 100, 200], index=0)
-        tracks_in_view = filtered_df.sort_values('popularity', ascending=False).head(display_count)
-        render_track_cards(tracks_in_view)
-
-        st.markdown("### 📊 Track analytics")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("Album Type Distribution")
-            album_dist = filtered_df['album_type'].value_counts()
-            if len(album_dist) > 0:
-                album_df = album_dist.reset_index()
-                album_df.columns = ["Album Type", "Count"]
-                fig_album = px.bar(
-                    album_df,
-                    x="Count",
-                    y="Album Type",
-                    orientation="h",
-                    title="Distribution by Album Type",
-                    color="Count",
-                    color_continuous_scale="Greens",
-                )
-                fig_album.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    showlegend=False,
-                    height=380,
-                    yaxis=dict(autorange="reversed"),
-                )
-                st.plotly_chart(fig_album)
-            else:
-                st.write("No album type distribution to show.")
-
-        with col2:
-            st.markdown("Popularity Distribution")
-            pop_series = filtered_df['popularity'].dropna()
-            pop_series = pop_series[pop_series > 0]
-            if pop_series.empty:
-                st.write("No popularity data to show.")
-            else:
-                pop_df = (
-                    pop_series.value_counts()
-                    .sort_index()
-                    .reset_index()
-                )
-                pop_df.columns = ["Popularity", "Count"]
-                fig_hist = px.line(
-                    pop_df,
-                    x="Popularity",
-                    y="Count",
-                    markers=True,
-                    title="Popularity Distribution (pop > 0)",
-                    color_discrete_sequence=['#1DB954']
-                )
-                fig_hist.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    xaxis_title="Popularity",
-                    yaxis_title="Number of Tracks",
-                    height=380,
-                )
-                st.plotly_chart(fig_hist)
-
+        render_all_tracks(filters)
     else:
-        # Overview: rich story with metrics, highlights, genres, trends, and a small track spotlight
-        stats = [
-            ("Tracks", f"{len(filtered_df):,}", "Within selected period"),
-            ("Avg popularity", f"{filtered_df['popularity'].mean():.1f}", "0–100 scale"),
-            ("Unique artists", f"{filtered_df['main_artist_name'].nunique():,}", "Primary artists"),
-        ]
-        st.markdown('<div class="metric-grid">', unsafe_allow_html=True)
-        for label, value, sub in stats:
-            st.markdown(
-                f"""
-                <div class="metric-card">
-                    <div class="metric-label">{label}</div>
-                    <div class="metric-value">{value}</div>
-                    <div class="metric-sub">{sub}</div>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-        st.markdown('</div>', unsafe_allow_html=True)
-
-        highlight_col1, highlight_col2 = st.columns([2, 1])
-        with highlight_col1:
-            st.markdown("### 🔥 Most popular track right now")
-            top_track = filtered_df.sort_values('popularity', ascending=False).iloc[0]
-            top_card = f"""
-            <div class="panel" style="display:flex; gap:16px; align-items:center;">
-                {create_cover_html(top_track.get('cover_image_url', None), 90)}
-                <div>
-                    <div class="pill">Popularity {int(top_track.get('popularity', 0))}/100</div>
-                    <h3 style="margin:6px 0;">{top_track.get('track_name', '')}</h3>
-                    <div class="muted">By {top_track.get('main_artist_name', '')}</div>
-                    <div class="muted">Album: {top_track.get('album_name', '')} • {top_track.get('release_year', '')}</div>
-                    <div style="margin-top:6px;">
-                        {"<a href='" + top_track['main_artist_spotify_url'] + "' target='_blank' style='color:var(--accent);text-decoration:none;'>Open in Spotify</a>" if top_track.get('main_artist_spotify_url') else ""}
-                    </div>
-                </div>
-            </div>
-            """
-            st.markdown(top_card, unsafe_allow_html=True)
-
-        with highlight_col2:
-            st.markdown("### 🆕 Fresh releases")
-            latest_releases = (
-                filtered_df.dropna(subset=['release_year'])
-                .sort_values(['release_year', 'popularity'], ascending=[False, False])
-                .head(4)
-            )
-            for _, row in latest_releases.iterrows():
-                st.markdown(
-                    f"""
-                    <div class="track-card">
-                        <div style="display:flex; align-items:center; gap:10px;">
-                            {create_cover_html(row.get('cover_image_url', None), 46)}
-                            <div>
-                                <div><strong>{row.get('track_name', '')}</strong></div>
-                                <div class="muted">{row.get('main_artist_name', '')} • {row.get('release_year', '')}</div>
-                            </div>
-                        </div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
-
-        st.markdown("### 💡 Quick insights")
-        insight_cols = st.columns(3)
-
-        with insight_cols[0]:
-            top_artist_avg = (
-                filtered_df.groupby('main_artist_name')['popularity']
-                .mean()
-                .sort_values(ascending=False)
-            )
-            if not top_artist_avg.empty:
-                artist_name = top_artist_avg.index[0]
-                artist_avg = top_artist_avg.iloc[0]
-                st.markdown(
-                    f"""
-                    <div class="metric-card">
-                        <div class="metric-label">Highest avg popularity</div>
-                        <div class="metric-value">{artist_name}</div>
-                        <div class="metric-sub">{artist_avg:.1f} / 100</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
-            else:
-                st.markdown(
-                    '<div class="metric-card"><div class="metric-label">Highest avg popularity</div><div class="metric-sub">No artist data</div></div>',
-                    unsafe_allow_html=True,
-                )
-
-        with insight_cols[1]:
-            album_mode = filtered_df['album_type'].mode(dropna=True)
-            if len(album_mode) > 0:
-                share = (filtered_df['album_type'] == album_mode.iloc[0]).mean() * 100
-                st.markdown(
-                    f"""
-                    <div class="metric-card">
-                        <div class="metric-label">Dominant format</div>
-                        <div class="metric-value">{album_mode.iloc[0].title()}</div>
-                        <div class="metric-sub">{share:.0f}% of filtered tracks</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
-            else:
-                st.markdown(
-                    '<div class="metric-card"><div class="metric-label">Dominant format</div><div class="metric-sub">No data</div></div>',
-                    unsafe_allow_html=True,
-                )
-
-        with insight_cols[2]:
-            recent_share = (filtered_df['release_year'] >= max_year_available - 2).mean() * 100
-            st.markdown(
-                f"""
-                <div class="metric-card">
-                    <div class="metric-label">Recent share</div>
-                    <div class="metric-value">{recent_share:.0f}%</div>
-                    <div class="metric-sub">Released in last 3 years</div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-
-        st.markdown("## 🎶 Genres & mood")
-        genre_col = next((c for c in ["genre", "genres", "artist_genres", "main_artist_genres", "primary_genre"] if c in filtered_df.columns), None)
-        if genre_col:
-            genre_stats = compute_genre_stats(filtered_df, genre_col)
-            if genre_stats.empty:
-                st.info("No genre values available in the current selection.")
-            else:
-                top_genres = genre_stats.head(12)
-                g1, g2 = st.columns([2, 1])
-                with g1:
-                    fig_genre = px.bar(
-                        top_genres,
-                        x="score",
-                        y="genre_clean",
-                        orientation="h",
-                        title="Top genres (diminishing volume + popularity)",
-                        color="score",
-                        color_continuous_scale="Greens",
-                        labels={"genre_clean": "Genre", "score": "Score"},
-                    )
-                    fig_genre.update_layout(
-                        plot_bgcolor="rgba(0,0,0,0)",
-                        height=420,
-                        showlegend=False,
-                        yaxis=dict(autorange="reversed"),
-                    )
-                    st.plotly_chart(fig_genre)
-                with g2:
-                    lead = top_genres.iloc[0]
-                    top5 = top_genres.head(5)
-                    lead_html = f"""
-                    <div class="panel" style="background:rgba(0,0,0,0.15); border:1px solid var(--border);">
-                        <div class="metric-label">Leading genre</div>
-                        <div class="metric-value" style="margin:4px 0;">{lead['genre_clean'].title()}</div>
-                        <div class="metric-sub">Tracks: {int(lead['tracks'])} • Artists: {int(lead['artists'])}</div>
-                        <div class="metric-sub">Avg popularity: {lead['pop_mean']:.1f} • Score: {lead['score']:.1f}</div>
-                        <div class="divider"></div>
-                        <div class="metric-label">Top 5</div>
-                        <ul style="padding-left:18px; margin:4px 0;">
-                    """
-                    for _, row in top5.iterrows():
-                        lead_html += f"<li>{row['genre_clean'].title()} • {int(row['tracks'])} tracks • pop {row['pop_mean']:.1f}</li>"
-                    lead_html += "</ul></div>"
-                    st.markdown(lead_html, unsafe_allow_html=True)
-        else:
-            st.info("No genre column found in the mart. Add a genre field to `main_mart.mart_spotify_tracks` (e.g., main artist genre) to enable this view.")
-
-        st.markdown("## 📈 Trends")
-        yearly_stats = filtered_df.groupby('release_year').agg({
-            'track_id': 'count',
-            'popularity': 'mean'
-        }).reset_index()
-        yearly_stats.columns = ['Year', 'Track Count', 'Avg Popularity']
-
-        tab1, tab2 = st.tabs(["Release trend", "Distributions"])
-        
-        with tab1:
-            fig_count = px.line(
-                yearly_stats, 
-                x='Year', 
-                y='Track Count',
-                title="Tracks Released per Year (in selected range)",
-                color_discrete_sequence=['#1DB954'],
-                markers=True
-            )
-            fig_count.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                xaxis_title="Release Year",
-                yaxis_title="Track Count"
-            )
-            st.plotly_chart(fig_count)
-
-        with tab2:
-            fig_pop = px.line(
-                yearly_stats, 
-                x='Year', 
-                y='Avg Popularity',
-                title="Average Popularity Trend (in selected range)",
-                color_discrete_sequence=['#1DB954'],
-                markers=True
-            )
-            fig_pop.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                xaxis_title="Release Year",
-                yaxis_title="Average Popularity"
-            )
-            st.plotly_chart(fig_pop)
-
-        st.markdown("## 🎵 Track spotlight")
-        display_count = st.selectbox("Number of tracks to display:", [10, 25, 50], index=0)
-        top_tracks = filtered_df.sort_values('popularity', ascending=False).head(display_count)
-        render_track_cards(top_tracks)
+        render_overview(filters, max_year_available)
 
     # ============================================================
     # Raw data viewer
     # ============================================================
     st.markdown("### 📥 Export filtered data")
-    st.download_button(
-        label="Download CSV",
-        data=filtered_df.to_csv(index=False).encode("utf-8"),
-        file_name=f"spotify_filtered_{year_from}_{year_to}.csv",
-        mime="text/csv",
-    )
+    # download_button needs the bytes up front; encode (or unpickle from cache) only once asked for
+    if st.toggle("Prepare downloads", key="export_open"):
+        export_col1, export_col2 = st.columns(2)
+        with export_col1:
+            st.download_button(
+                label="Download Parquet",
+                data=to_parquet_bytes(filters),
+                file_name=f"spotify_filtered_{year_from}_{year_to}.parquet",
+                mime="application/vnd.apache.parquet",
+            )
+        with export_col2:
+            st.download_button(
+                label="Download CSV",
+                data=to_csv_bytes(filters),
+                file_name=f"spotify_filtered_{year_from}_{year_to}.csv",
+                mime="text/csv",
+            )
     with st.expander("📋 Raw Data (Filtered)"):
-        st.dataframe(filtered_df, width='stretch')
+        # Expander bodies run even when collapsed, so only ship rows once asked for
+        if st.toggle("Load raw data", key="raw_open"):
+            preview_tbl, total_rows = load_raw_preview(filters)
+            if total_rows > RAW_PREVIEW_ROWS:
+                st.caption(f"Showing the {RAW_PREVIEW_ROWS:,} most popular of {total_rows:,} rows; use the downloads for everything.")
+            # Arrow goes straight to the frontend as IPC, no pandas round-trip
+            st.dataframe(preview_tbl, width='stretch')
 
     # Footer
     st.markdown("---")
@@ -1,15 +1,22 @@
 import os
+import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Iterable, List
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 from dotenv import load_dotenv
 load_dotenv()
 
 import dlt
 import duckdb
+import orjson
+import pyarrow as pa
+import requests
 import spotipy
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from spotipy.oauth2 import SpotifyClientCredentials
 
 
@@ -23,13 +30,39 @@ PROJECT_ROOT = DLT_DIR.parent
 DATA_WAREHOUSE_DIR = PROJECT_ROOT / "data_warehouse"
 DUCKDB_PATH = DATA_WAREHOUSE_DIR / "spotify.duckdb"
 ARTIST_ENRICH_TABLE = "spotify_artists_enriched"
+ARTIST_IDS_SEEN_TABLE = "artist_ids_seen"
 PLAYLIST_TRACKS_TABLE = "spotify_playlist_tracks"
+SEARCH_TOTALS_TABLE = "search_totals"
+# How long a cached zero-result (year, query, market) total is trusted before it is searched
+# again. Kept well under the daily 06:00 schedule, so each scheduled run re-checks totals
+# cached by the previous one instead of skipping them every other day.
+SEARCH_TOTALS_TTL = timedelta(hours=20)
+
+# Guards the per-run track id set shared by parallel search resources
+_SEEN_IDS_LOCK = threading.Lock()
+
+# Concurrent search-page requests per (year, query) resource
+SEARCH_PAGE_WORKERS = int(os.getenv("SPOTIFY_SEARCH_PAGE_WORKERS", "4"))
+# Concurrent 50-id requests to the Artists API during enrichment
+ARTIST_BATCH_WORKERS = int(os.getenv("SPOTIFY_ARTIST_BATCH_WORKERS", "8"))
+# Keep-alive connections to api.spotify.com; covers dlt extract workers x page workers
+HTTP_POOL_SIZE = 32
+# Attempts per Spotify request on 429/5xx before the error surfaces
+HTTP_RETRIES = 5
+# Rows per Arrow record batch when bulk-loading enriched artists
+ARTIST_RECORD_BATCH_ROWS = 1000
 
 
 # ============================================================
 #  Spotify client (Client Credentials)
 # ============================================================
 
+def _orjson_response(response: requests.Response, *args, **kwargs) -> requests.Response:
+    """Decode Spotify's JSON bodies with orjson when spotipy calls response.json()."""
+    response.json = lambda **_: orjson.loads(response.content)
+    return response
+
+
 def make_spotify_client() -> spotipy.Spotify:
     client_id = os.getenv("SPOTIPY_CLIENT_ID")
     client_secret = os.getenv("SPOTIPY_CLIENT_SECRET")
@@ -44,29 +77,69 @@ def make_spotify_client() -> spotipy.Spotify:
         client_id=client_id,
         client_secret=client_secret
     )
-    return spotipy.Spotify(auth_manager=auth_manager)
+    # One keep-alive pool shared by every resource and page worker, sized so
+    # concurrent requests reuse sockets instead of re-doing TLS handshakes.
+    # Transient 429/5xx responses are retried in the adapter with exponential backoff,
+    # honouring Retry-After, so one throttled page doesn't abort its resource.
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=None,
+        read=False,
+        status=HTTP_RETRIES,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        respect_retry_after_header=True,
+    )
+    session = requests.Session()
+    session.hooks["response"].append(_orjson_response)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session.mount("https://", adapter)
+    return spotipy.Spotify(auth_manager=auth_manager, requests_session=session)
+
+
+_SP: spotipy.Spotify | None = None
+_SP_LOCK = threading.Lock()
 
 
-@lru_cache(maxsize=1)
 def _spotify_client() -> spotipy.Spotify:
     """
-    Lazily create and cache the Spotify client so Dagster can import this module
+    Lazily create the process-wide Spotify client so Dagster can import this module
     even when the secrets are not present at process start. Secrets are required
     when the asset actually executes.
     """
-    return make_spotify_client()
+    global _SP
+    if _SP is None:
+        # Parallel resources can race here on first use; build the client only once
+        with _SP_LOCK:
+            if _SP is None:
+                sp = make_spotify_client()
+                # Fetch the token now so the first page requests don't all queue on it
+                sp.auth_manager.get_access_token(as_dict=False)
+                _SP = sp
+    return _SP
 
 
 # ============================================================
 #  dlt-resource: Spotify search per year with a popularity filter
 # ============================================================
 
+# parallelized: dlt runs the (year, query) generators on its extract thread pool
+# (size via the EXTRACT__WORKERS setting), so page fetches overlap instead of
+# running back to back. Throttled (429) and 5xx responses are retried by the urllib3
+# Retry on the shared session's adapter (see make_spotify_client), with backoff and
+# respect_retry_after_header; spotipy's own retry is off because it doesn't build the session.
 @dlt.resource(
     table_name="raw_spotify_tracks",
-    write_disposition="append",
+    # Upsert on the Spotify track id so daily re-runs replace rows instead of piling up copies
+    write_disposition="merge",
+    primary_key="id",
     columns={
         "preview_url": {"data_type": "text"},
-    }
+        "_search_year": {"data_type": "bigint"},
+        "_search_query": {"data_type": "text"},
+    },
+    parallelized=True,
 )
 def spotify_search_tracks(
     query: str,
@@ -74,6 +147,9 @@ def spotify_search_tracks(
     limit: int = 50,
     market: str | None = None,
     min_popularity: int | None = None,
+    seen_ids: set[str] | None = None,
+    cached_total: int | None = None,
+    search_totals: dict[tuple[str, int, str], int] | None = None,
 ):
     """
     Fetch tracks from the Spotify Search API for a single year, with pagination.
@@ -83,6 +159,12 @@ def spotify_search_tracks(
     - limit:          1-50 (Spotify max 50)
     - market:         e.g., "SE" or None
     - min_popularity: 0-100, e.g., 70 to include only fairly popular tracks
+    - seen_ids:       track ids already emitted by sibling resources in this run; shared
+                      across resources so overlapping queries don't load the same track twice
+    - cached_total:   result total recorded for this (year, query, market) within SEARCH_TOTALS_TTL;
+                      0 skips the search entirely
+    - search_totals:  receives the fresh total from page 0, keyed on (query, year, market);
+                      a missing market is keyed as ""
     """
 
     limit = max(1, min(limit, 50))
@@ -92,47 +174,77 @@ def spotify_search_tracks(
     else:
         base_q = f"year:{year}"
 
-    offset = 0
     max_total = 10_000
     processed = 0
     print(f"[DLT] Start search q='{base_q}' market={market} min_popularity={min_popularity}")
 
-    sp = _spotify_client()
-
-    while True:
-        search_kwargs = {
-            "q": base_q,
-            "type": "track",
-            "limit": limit,
-            "offset": offset,
-        }
-        if market:
-            search_kwargs["market"] = market
-
-        results = sp.search(**search_kwargs)
-
-        tracks_obj = results.get("tracks", {})
-        items = tracks_obj.get("items", [])
-        total = tracks_obj.get("total", 0)
-
-        if not items:
-            break
-
-        for t in items:
-            pop = t.get("popularity", 0)
-            if (min_popularity is None) or (pop >= min_popularity):
-                yield t
-
-        offset += limit
+    if cached_total == 0:
+        print(f"[DLT] Skip q='{base_q}': no results within the last {SEARCH_TOTALS_TTL}")
+        return
 
-        if offset >= total:
-            break
-        if offset >= max_total:
-            break
+    sp = _spotify_client()
 
-        processed += len(items)
-        if processed % (limit * 5) == 0:
-            print(f"[DLT] q='{base_q}' market={market} processed ~{processed}/{total} (max 10k)")
+    # Only the offset varies per page; pages run on several threads, so copy rather than mutate
+    search_kwargs = {
+        "q": base_q,
+        "type": "track",
+        "limit": limit,
+    }
+    if market:
+        search_kwargs["market"] = market
+
+    def fetch_page(offset: int) -> dict:
+        return sp.search(**search_kwargs, offset=offset).get("tracks", {})
+
+    # Resolve the popularity predicate once rather than re-testing min_popularity per track
+    def popular_enough(t: dict) -> bool:
+        return t.get("popularity", 0) >= min_popularity
+
+    keep = None if min_popularity is None else popular_enough
+
+    # Page 0 tells us the total; the remaining offsets are known up front and
+    # fetched concurrently so request latencies overlap instead of adding up.
+    first_page = fetch_page(0)
+    total = first_page.get("total", 0)
+    if search_totals is not None:
+        search_totals[(query, year, market or "")] = total
+    offsets = range(limit, min(total, max_total), limit)
+
+    pool = ThreadPoolExecutor(max_workers=SEARCH_PAGE_WORKERS)
+    try:
+        # map() keeps page order, so output matches the sequential walk
+        pages = chain([first_page], pool.map(fetch_page, offsets))
+        for tracks_obj in pages:
+            items = tracks_obj.get("items", [])
+            if not items:
+                break
+
+            # Yield the whole page: dlt normalizes and writes a list as one batch
+            page = items if keep is None else list(filter(keep, items))
+            if seen_ids is not None:
+                with _SEEN_IDS_LOCK:
+                    page = [t for t in page if t.get("id") not in seen_ids]
+                    seen_ids.update(t.get("id") for t in page)
+            if page:
+                # Record which (year, query) pair claimed the track; every resource lands
+                # in the one raw_spotify_tracks table, so this is the only trace of it.
+                # With concurrent resources the claiming pair is first-come, not fixed.
+                for t in page:
+                    t["_search_year"] = year
+                    t["_search_query"] = query
+                yield page
+
+            processed += len(items)
+            if processed % (limit * 5) == 0:
+                print(f"[DLT] q='{base_q}' market={market} processed ~{processed}/{total} (max 10k)")
+
+            # A short page is the real end even when the reported total claims more;
+            # stop here so queued offsets past it are cancelled rather than requested
+            if len(items) < limit:
+                break
+    finally:
+        # Don't wait on pages we no longer need after an early stop
+        pool.shutdown(wait=True, cancel_futures=True)
 
 
 # ============================================================
@@ -146,13 +258,21 @@ def spotify_source(
     limit: int = 50,
     market: str | None = None,
     min_popularity: int | None = None,
+    cached_totals: dict[tuple[str, int, str], int] | None = None,
+    search_totals: dict[tuple[str, int, str], int] | None = None,
 ):
     """
     Build multiple resources:
     - one per (year, query) combination.
+
+    The resources run concurrently (parallelized) and share one seen-id set, so a
+    track is loaded once, by whichever resource returns it first. The broad "" query
+    is only scheduled first; that does not guarantee it claims the overlapping ids.
     """
+    seen_ids: set[str] = set()
+    ordered_queries = sorted(queries, key=bool)
     for year in years:
-        for q in queries:
+        for q in ordered_queries:
             safe_name = q if q else "all"
             safe_name = safe_name.replace(" ", "_").replace(":", "_")
 
@@ -162,13 +282,153 @@ def spotify_source(
                 limit=limit,
                 market=market,
                 min_popularity=min_popularity,
+                seen_ids=seen_ids,
+                cached_total=(cached_totals or {}).get((q, year, market or "")),
+                search_totals=search_totals,
+            # Resource names must be unique within a source; the table stays raw_spotify_tracks
             ).with_name(f"tracks_{year}_{safe_name}")
 
 
+# ============================================================
+#  Cached search totals
+# ============================================================
+
+def _search_totals_columns(con: duckdb.DuckDBPyConnection) -> set[str]:
+    """Column names of staging.search_totals; empty when the table does not exist."""
+    return {
+        name for (name,) in con.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = 'staging' AND table_name = ?",
+            [SEARCH_TOTALS_TABLE],
+        ).fetchall()
+    }
+
+
+def load_search_totals(duckdb_path: Path = DUCKDB_PATH) -> dict[tuple[str, int, str], int]:
+    """
+    Return {(query, year, market): total} for searches recorded within SEARCH_TOTALS_TTL.
+    Empty when the warehouse or the table does not exist yet.
+    """
+    if not duckdb_path.exists():
+        return {}
+
+    with duckdb.connect(str(duckdb_path), read_only=True) as con:
+        if "market" not in _search_totals_columns(con):
+            return {}
+        rows = con.execute(
+            f"SELECT query, year, market, total FROM staging.{SEARCH_TOTALS_TABLE} WHERE fetched_at >= ?",
+            [datetime.now(timezone.utc) - SEARCH_TOTALS_TTL],
+        ).fetchall()
+    return {(q, y, m): t for q, y, m, t in rows}
+
+
+def save_search_totals(totals: dict[tuple[str, int, str], int], duckdb_path: Path = DUCKDB_PATH):
+    """
+    Upsert the page-0 totals seen in this run into staging.search_totals.
+    """
+    if not totals:
+        return
+
+    fetched_at = datetime.now(timezone.utc)
+    with duckdb.connect(str(duckdb_path)) as con:
+        con.execute("CREATE SCHEMA IF NOT EXISTS staging")
+        columns = _search_totals_columns(con)
+        if columns and "market" not in columns:
+            # Totals cached before they were keyed per market; it's only a cache, start over
+            con.execute(f"DROP TABLE staging.{SEARCH_TOTALS_TABLE}")
+        con.execute(f"""
+            CREATE TABLE IF NOT EXISTS staging.{SEARCH_TOTALS_TABLE} (
+                query VARCHAR,
+                year INTEGER,
+                market VARCHAR,
+                total INTEGER,
+                fetched_at TIMESTAMPTZ,
+                PRIMARY KEY (query, year, market)
+            )
+        """)
+        con.executemany(
+            f"""
+            INSERT INTO staging.{SEARCH_TOTALS_TABLE} VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (query, year, market) DO UPDATE SET total = excluded.total, fetched_at = excluded.fetched_at
+            """,
+            [(q, y, m, t, fetched_at) for (q, y, m), t in totals.items()],
+        )
+
+
 # ============================================================
 #  Pipeline-runner
 # ============================================================
 
+def _migrate_tracks_to_merge(duckdb_path: Path = DUCKDB_PATH):
+    """
+    One-off conversion of an append-era staging.raw_spotify_tracks for the merge disposition.
+
+    Merge needs unique track ids in the root table and a _dlt_root_id on every child table,
+    which dlt cannot add to an existing DuckDB table itself. Runs only while some child
+    table still lacks _dlt_root_id.
+    """
+    if not duckdb_path.exists():
+        return
+
+    with duckdb.connect(str(duckdb_path)) as con:
+        tables = {
+            name for (name,) in con.execute(
+                "SELECT table_name FROM information_schema.tables WHERE table_schema = 'staging'"
+            ).fetchall()
+        }
+        if "raw_spotify_tracks" not in tables:
+            return
+
+        legacy_children = [
+            name for (name,) in con.execute("""
+                SELECT t.table_name
+                FROM information_schema.tables t
+                WHERE t.table_schema = 'staging'
+                  AND starts_with(t.table_name, 'raw_spotify_tracks__')
+                  AND NOT EXISTS (
+                      SELECT 1 FROM information_schema.columns c
+                      WHERE c.table_schema = 'staging'
+                        AND c.table_name = t.table_name
+                        AND c.column_name = '_dlt_root_id'
+                  )
+            """).fetchall()
+        ]
+        if not legacy_children:
+            return
+
+        print(f"[DLT] Migrating raw_spotify_tracks to merge; child tables: {legacy_children}")
+        rebuilt = []
+        for child in legacy_children:
+            # Children hanging directly off a track row get their parent as root id;
+            # anything nested deeper is dropped and rebuilt by dlt from the next load
+            orphans = con.execute(f"""
+                SELECT count(*) FROM staging.{child} c
+                ANTI JOIN staging.raw_spotify_tracks r ON c._dlt_parent_id = r._dlt_id
+            """).fetchone()[0]
+            if orphans:
+                con.execute(f"DROP TABLE staging.{child}")
+            else:
+                con.execute(f"""
+                    CREATE OR REPLACE TABLE staging.{child} AS
+                    SELECT *, _dlt_parent_id AS _dlt_root_id FROM staging.{child}
+                """)
+                rebuilt.append(child)
+
+        # Keep the newest copy of each track, then drop child rows of the discarded copies
+        con.execute("""
+            CREATE OR REPLACE TABLE staging.raw_spotify_tracks AS
+            SELECT DISTINCT ON (id) *
+            FROM staging.raw_spotify_tracks
+            ORDER BY id, _dlt_load_id DESC
+        """)
+        for child in rebuilt:
+            con.execute(f"""
+                DELETE FROM staging.{child} c
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM staging.raw_spotify_tracks r WHERE r._dlt_id = c._dlt_root_id
+                )
+            """)
+
+
 def run_pipeline(
     queries: list[str],
     years: list[int],
@@ -181,6 +441,7 @@ def run_pipeline(
     Run the dlt pipeline and load results into DuckDB in the project root.
     """
     DATA_WAREHOUSE_DIR.mkdir(parents=True, exist_ok=True)
+    _migrate_tracks_to_merge(duckdb_path)
 
     pipeline = dlt.pipeline(
         pipeline_name="spotify_tracks",
@@ -188,15 +449,20 @@ def run_pipeline(
         dataset_name="staging",
     )
 
+    # (year, query, market) combinations that returned nothing recently are skipped without a request
+    search_totals: dict[tuple[str, int, str], int] = {}
     src = spotify_source(
         queries=queries,
         years=years,
         limit=limit,
         market=market,
         min_popularity=min_popularity,
+        cached_totals=load_search_totals(duckdb_path),
+        search_totals=search_totals,
     )
 
     load_info = pipeline.run(src)
+    save_search_totals(search_totals, duckdb_path)
 
     print("Pipeline finished.")
     print(f"DuckDB path: {duckdb_path}")
@@ -207,7 +473,7 @@ def run_pipeline(
 #  Artist enrichment (genres/followers/popularity)
 # ============================================================
 
-def _batch(iterable: List[str], size: int) -> Iterable[List[str]]:
+def _batch(iterable: List, size: int) -> Iterable[List]:
     for i in range(0, len(iterable), size):
         yield iterable[i:i + size]
 
@@ -215,80 +481,142 @@ def _batch(iterable: List[str], size: int) -> Iterable[List[str]]:
 def fetch_artist_genres(artist_ids: list[str]):
     """
     Fetch genres/popularity/followers for a list of artist_ids using Spotify Artists API.
-    Returns generator of dicts ready for loading.
+    Returns generator of row lists (one per 50-id batch) ready for loading.
     """
     sp = _spotify_client()
-    fetched_at = datetime.now().isoformat()
-    for chunk in _batch(artist_ids, 50):
-        res = sp.artists(chunk) or {}
-        artists = res.get("artists", [])
-        for a in artists:
-            if not a:
-                continue
-            yield {
-                "artist_id": a.get("id"),
-                "artist_name": a.get("name"),
-                "genres": a.get("genres", []),
-                "popularity": a.get("popularity"),
-                "followers": (a.get("followers") or {}).get("total"),
-                "fetched_at": fetched_at,
-            }
-
-
-@dlt.resource(
-    table_name=ARTIST_ENRICH_TABLE,
-    write_disposition="append",
-    columns={
-        "artist_id": {"data_type": "text", "primary_key": True},
-        "genres": {"data_type": "json"},
-        "artist_name": {"data_type": "text"},
-        "popularity": {"data_type": "bigint"},
-        "followers": {"data_type": "bigint"},
-        "fetched_at": {"data_type": "text"},
+    # One tz-aware value for the whole run; stored as a TIMESTAMP, not a per-row ISO string
+    fetched_at = datetime.now(timezone.utc)
+
+    def fetch_batch(chunk: list[str]) -> list[dict]:
+        return (sp.artists(chunk) or {}).get("artists", [])
+
+    # Several 50-id batches in flight at once; map() yields them back in order
+    with ThreadPoolExecutor(max_workers=ARTIST_BATCH_WORKERS) as pool:
+        for artists in pool.map(fetch_batch, _batch(artist_ids, 50)):
+            rows = [
+                {
+                    "artist_id": a.get("id"),
+                    "artist_name": a.get("name"),
+                    "genres": a.get("genres", []),
+                    "popularity": a.get("popularity"),
+                    "followers": (a.get("followers") or {}).get("total"),
+                    "fetched_at": fetched_at,
+                }
+                for a in artists
+                if a
+            ]
+            if rows:
+                yield rows
+
+
+# Column layout of staging.spotify_artists_enriched; genres stay a native LIST<VARCHAR>
+ARTIST_ENRICH_SCHEMA = pa.schema([
+    ("artist_id", pa.string()),
+    ("artist_name", pa.string()),
+    ("genres", pa.list_(pa.string())),
+    ("popularity", pa.int64()),
+    ("followers", pa.int64()),
+    ("fetched_at", pa.timestamp("us", tz="UTC")),
+])
+
+
+def _ensure_artist_enrich_table(con: duckdb.DuckDBPyConnection):
+    """
+    Create staging.spotify_artists_enriched, converting a table left behind by the
+    former dlt loader (JSON genres plus _dlt_* columns) to the plain layout.
+    """
+    columns = {
+        name for (name,) in con.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = 'staging' AND table_name = ?",
+            [ARTIST_ENRICH_TABLE],
+        ).fetchall()
     }
-)
-def spotify_artists_resource(artist_ids: list[str]):
-    yield from fetch_artist_genres(artist_ids)
+    if "_dlt_id" in columns:
+        con.execute(f"""
+            CREATE OR REPLACE TABLE staging.{ARTIST_ENRICH_TABLE} AS
+            SELECT
+                artist_id,
+                artist_name,
+                CAST(genres AS VARCHAR[])        AS genres,
+                popularity,
+                followers,
+                CAST(fetched_at AS TIMESTAMPTZ)  AS fetched_at
+            FROM staging.{ARTIST_ENRICH_TABLE}
+        """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS staging.{ARTIST_ENRICH_TABLE} (
+            artist_id VARCHAR,
+            artist_name VARCHAR,
+            genres VARCHAR[],
+            popularity BIGINT,
+            followers BIGINT,
+            fetched_at TIMESTAMPTZ
+        )
+    """)
 
 
 def run_artist_enrichment(duckdb_path: Path = DUCKDB_PATH, max_artists: int | None = None):
     """
     Look at staging.raw_spotify_tracks__artists, find unseen artist_ids,
-    fetch genres via Spotify Artists API, and load into staging.spotify_artists_enriched.
+    fetch genres via Spotify Artists API, and bulk-insert into staging.spotify_artists_enriched.
     """
     if not duckdb_path.exists():
         raise RuntimeError(f"DuckDB file missing at {duckdb_path}. Run track pipeline first.")
 
-    con = duckdb.connect(str(duckdb_path))
-
-    # Gather distinct artist IDs from staging
-    distinct_artist_ids = con.execute("SELECT DISTINCT id AS artist_id FROM staging.raw_spotify_tracks__artists").fetchall()
-    all_ids = [row[0] for row in distinct_artist_ids if row[0]]
-
-    # Exclude already enriched artists
-    table_exists = con.execute(
-        "SELECT count(*) FROM information_schema.tables WHERE table_schema = 'staging' AND table_name = ?", [ARTIST_ENRICH_TABLE]
-    ).fetchone()[0] > 0
-    existing_ids: set[str] = set()
-    if table_exists:
-        existing_ids = {row[0] for row in con.execute(f"SELECT artist_id FROM staging.{ARTIST_ENRICH_TABLE}").fetchall()}
-
-    missing_ids = [aid for aid in all_ids if aid not in existing_ids]
-    if max_artists:
-        missing_ids = missing_ids[:max_artists]
+    with duckdb.connect(str(duckdb_path)) as con:
+        # Incrementally maintained set of artist ids seen in staging: only track rows
+        # from loads newer than the last recorded one are scanned on each run.
+        con.execute(f"""
+            CREATE TABLE IF NOT EXISTS staging.{ARTIST_IDS_SEEN_TABLE} (
+                artist_id VARCHAR PRIMARY KEY,
+                first_seen_load_id VARCHAR
+            )
+        """)
+        con.execute(f"""
+            INSERT INTO staging.{ARTIST_IDS_SEEN_TABLE}
+            SELECT a.id, min(t._dlt_load_id)
+            FROM staging.raw_spotify_tracks__artists a
+            JOIN staging.raw_spotify_tracks t ON a._dlt_parent_id = t._dlt_id
+            WHERE t._dlt_load_id > (
+                SELECT coalesce(max(first_seen_load_id), '') FROM staging.{ARTIST_IDS_SEEN_TABLE}
+            )
+              AND a.id IS NOT NULL AND a.id <> ''
+            GROUP BY a.id
+            ON CONFLICT DO NOTHING
+        """)
+
+        # Convert or create the enriched table up front, even when nothing new is fetched:
+        # dim_spotify_track_artists reads genres as a native list
+        _ensure_artist_enrich_table(con)
+
+        # Set difference runs as a DuckDB anti-join; only the missing ids come back to Python
+        query = (
+            f"SELECT s.artist_id FROM staging.{ARTIST_IDS_SEEN_TABLE} s"
+            f" ANTI JOIN staging.{ARTIST_ENRICH_TABLE} e ON s.artist_id = e.artist_id"
+        )
+        if max_artists:
+            query += f" LIMIT {int(max_artists)}"
+        missing_ids = con.execute(query).fetch_arrow_table().column(0).to_pylist()
 
     if not missing_ids:
         print("No new artists to enrich.")
         return
 
-    pipeline = dlt.pipeline(
-        pipeline_name="spotify_tracks",
-        destination=dlt.destinations.duckdb(str(duckdb_path)),
-        dataset_name="staging",
-    )
-    load_info = pipeline.run(spotify_artists_resource(missing_ids))
-    print(f"Enriched {len(missing_ids)} artists.")
-    print(load_info)
+    # Collect all fetched rows, cut them into columnar record batches, then bulk-insert
+    # through DuckDB's Arrow scan: one INSERT instead of dlt's row-wise normalize and load.
+    rows = list(chain.from_iterable(fetch_artist_genres(missing_ids)))
+    batches = [
+        pa.RecordBatch.from_pylist(chunk, schema=ARTIST_ENRICH_SCHEMA)
+        for chunk in _batch(rows, ARTIST_RECORD_BATCH_ROWS)
+    ]
+    artists_tbl = pa.Table.from_batches(batches, schema=ARTIST_ENRICH_SCHEMA)
+
+    with duckdb.connect(str(duckdb_path)) as con:
+        con.register("artists_batch", artists_tbl)
+        con.execute(f"INSERT INTO staging.{ARTIST_ENRICH_TABLE} BY NAME SELECT * FROM artists_batch")
+        con.unregister("artists_batch")
+
+    print(f"Enriched {artists_tbl.num_rows} of {len(missing_ids)} artists.")
 
 
 # ============================================================
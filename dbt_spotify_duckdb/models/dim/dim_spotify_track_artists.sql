@@ -22,13 +22,7 @@ select
     artists_raw.id                     as artist_id,
     artists_raw.name                   as artist_name,
     artists_raw.external_urls__spotify as artist_spotify_url,
-    list_transform(
-      string_split(
-        regexp_replace(cast(e.genres as varchar), '\\\\[|\\\\]|\\"', ''),
-        ','
-      ),
-      x -> trim(x)
-    ) as genres
+    list_transform(e.genres, x -> trim(x)) as genres
 from artists_raw
 join tracks t
     on artists_raw._dlt_parent_id = t._dlt_id
@@ -0,0 +1,37 @@
+-- mart_spotify_genre_stats.sql
+-- Genre leaderboard across the whole catalog, based on main artist genres.
+-- One row per genre. The dashboard reads this directly when no filters are active.
+
+{{ config(
+    materialized = "table"
+) }}
+
+with cleaned as (
+
+    select
+        t.track_id,
+        t.main_artist_name,
+        t.popularity,
+        g.genre_clean
+    from {{ ref('mart_spotify_track_genres') }} g
+    join {{ ref('mart_spotify_tracks') }} t
+        on g.track_id = t.track_id
+    where t.track_name is not null
+      and t.release_year is not null
+
+)
+
+select
+    genre_clean,
+    count(distinct track_id)                                    as tracks,
+    count(distinct main_artist_name)                            as artists,
+    sum(coalesce(popularity, 0) / 100.0)                        as popularity_score,
+    avg(popularity)                                             as pop_mean,
+
+    -- Diminishing returns on volume, still reward bigger pools
+    sqrt(count(distinct track_id)) * 25                         as volume_weight,
+    sqrt(count(distinct track_id)) * 25 + avg(popularity)       as score
+
+from cleaned
+group by genre_clean
+order by score desc
@@ -0,0 +1,33 @@
+-- mart_spotify_track_genres.sql
+-- Long-form genre bridge: genres exploded and cleaned once at build time.
+-- One row per (track_id, genre_clean), based on main artist genres.
+
+{{ config(
+    materialized = "table"
+) }}
+
+with track_genres as (
+
+    select
+        track_id,
+        unnest(list_distinct(list_transform(main_artist_genres, x -> lower(trim(x))))) as genre
+    from {{ ref('mart_spotify_tracks') }}
+    where main_artist_genres is not null
+
+),
+
+cleaned as (
+
+    select
+        track_id,
+        lower(trim(regexp_replace(genre, '[\[\]{}"'']', '', 'g'))) as genre_clean
+    from track_genres
+
+)
+
+select distinct
+    track_id,
+    genre_clean
+from cleaned
+where genre_clean is not null
+  and genre_clean <> ''
@@ -2,9 +2,10 @@
 -- General-purpose mart for Spotify tracks.
 -- One row per track, enriched with main artist and a single cover image.
 -- Filters (year, popularity, etc.) are meant to be applied in the dashboard.
+-- Materialized as a table so dashboard queries don't re-run the dim joins/window functions.
 
 {{ config(
-    materialized = "view"
+    materialized = "table"
 ) }}
 
 with tracks as (
@@ -110,7 +111,11 @@ select
 
     ci.cover_image_url,
     ci.cover_height,
-    ci.cover_width
+    ci.cover_width,
+
+    -- Lowercased once at build time for the dashboard search box
+    lower(t.track_name)         as track_name_lc,
+    lower(ma.main_artist_name)  as main_artist_name_lc
 
 from tracks t
 left join main_artist ma